@@ -1,6 +1,6 @@
 """全局依赖：鉴权、Request ID 等。"""
 
-from uuid import uuid4
+import secrets
 
 from fastapi import Request
 
@@ -13,7 +13,8 @@ require_api_key = verify_api_key
 
 async def get_request_id(request: Request) -> str:
     """从请求头获取或生成 request_id，并注入上下文。"""
-    rid = request.headers.get("X-Request-ID") or str(uuid4())
+    # token_hex 一次 C 调用产出 128 位随机 hex，比 str(uuid4()) 省掉格式化开销
+    rid = request.headers.get("X-Request-ID") or secrets.token_hex(16)
     set_request_id(rid)
     return rid
 
@@ -8,6 +8,9 @@ from app.schemas.common import ApiResponse
 
 router = APIRouter()
 
+# 启动时绑定一次配置，readiness 热路径不再每请求调用 get_settings
+_SETTINGS = get_settings()
+
 
 @router.get("/live")
 async def liveness() -> dict[str, str]:
@@ -18,10 +21,9 @@ async def liveness() -> dict[str, str]:
 @router.get("/ready", response_model=ApiResponse[dict])
 async def readiness(request_id: str = Depends(get_request_id)) -> ApiResponse[dict]:
     """K8s readiness：当前仅返回应用状态；后续接入 DB/Redis 后再做真实探测。"""
-    settings = get_settings()
     return ApiResponse(
         code=0,
         message="ok",
-        data={"env": settings.env},
+        data={"env": _SETTINGS.env},
         request_id=request_id,
     )
@@ -8,6 +8,7 @@ from __future__ import annotations
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi.responses import ORJSONResponse
 
 from app.api.dependencies import get_request_id, require_api_key
 from app.observability.logging import get_logger
@@ -38,8 +39,13 @@ async def create_xhs_note_report(
     ),
     request_id: str = Depends(get_request_id),
     _api_key: str = Depends(require_api_key),
-) -> ApiResponse[XhsNoteReportResponse]:
-    """生成小红书爆款笔记撰写报告。"""
+) -> ORJSONResponse:
+    """生成小红书爆款笔记撰写报告。
+
+    直接返回 ORJSONResponse 而非 Pydantic 模型：报告可达数十 KB，
+    绕过 response_model 校验与 jsonable_encoder 的逐字段遍历，
+    由 orjson 一次性序列化；response_model 仅保留用于 OpenAPI 文档。
+    """
     try:
         final_report, error = await generate_xhs_note_report(
             idea_text=idea_text,
@@ -53,18 +59,21 @@ async def create_xhs_note_report(
         ) from exc
 
     if error or final_report is None:
-        return ApiResponse(
-            code=1,
-            message=f"小红书笔记生成失败: {error}",
-            data=None,
-            request_id=request_id,
+        return ORJSONResponse(
+            {
+                "code": 1,
+                "message": f"小红书笔记生成失败: {error}",
+                "data": None,
+                "request_id": request_id,
+            }
         )
 
-    response_payload = XhsNoteReportResponse(report=final_report)
-    return ApiResponse(
-        code=0,
-        message="ok",
-        data=response_payload,
-        request_id=request_id,
+    return ORJSONResponse(
+        {
+            "code": 0,
+            "message": "ok",
+            "data": {"report": final_report},
+            "request_id": request_id,
+        }
     )
 
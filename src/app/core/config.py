@@ -1,12 +1,17 @@
 """基于 Pydantic Settings 的配置管理，支持环境变量与 .env 分层加载。"""
 
 import os
-from functools import lru_cache
+import re
+from functools import cached_property, lru_cache
+from pathlib import Path
 from typing import Any, Literal
 
 from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# 逗号分隔的 Key 列表：预编译一次，split 整串走 C 级扫描
+_API_KEYS_RE = re.compile(r"\s*,\s*")
+
 
 class Settings(BaseSettings):
     """
@@ -18,6 +23,8 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         extra="ignore",
+        # 配置在进程内只读：frozen 拦住意外赋值，也让各 cached_property 安全
+        frozen=True,
     )
 
     env: Literal["development", "staging", "production"] = "development"
@@ -25,9 +32,17 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     # 日志目录，按小时轮转；app.log 为全部级别，error.log 仅 ERROR
     log_dir: str = "./logs"
+    # HTTP trace 日志的采样率（0..1）：未被采样的请求仍记录轻量的
+    # start/finish 事件，但跳过 body 预览等较重的序列化工作
+    trace_sample_rate: float = 1.0
 
     database_url: str = "sqlite+aiosqlite:///./app.db"
     database_echo: bool = False
+    # 连接池大小：常驻连接数 / 突发溢出上限，按部署压测结果调整
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    # 启动时预热的连接数，0 表示不预热（开发环境 SQLite 无需预热）
+    db_pool_prewarm: int = 0
 
     redis_url: str = "redis://localhost:6379/0"
 
@@ -59,10 +74,19 @@ class Settings(BaseSettings):
     xhs_image_max_size: int = 1024
     # JPEG/WebP 质量 1–100，仅影响有损格式
     xhs_image_quality: int = 85
+    # 已合规（JPEG 且长边不超限）的上传图体积不超过该阈值时跳过重编码；
+    # 0 表示总是重编码
+    xhs_image_size_threshold: int = 1 << 20
     # 单次请求允许上传的最大图片数量，默认 20，可通过 APP_XHS_MAX_IMAGES 覆盖
     xhs_max_images: int = 20
     # CrewAI 执行超时时间（秒），默认 10 分钟
     crew_execution_timeout: int = 600
+    # 每张图一个 Crew 并发执行时的并发上限，防止触发 LLM 限流
+    max_concurrent_image_tasks: int = 4
+    # 图片工具输出模式：data_url（默认，Base64 内联，兼容 API 模型）；
+    # file_uri（返回 file:// 引用，供能直接读本地文件的进程内模型使用，
+    # 跳过整条 Base64 编码链路，省 33% 负载体积与等量内存分配）
+    image_tool_mode: str = "data_url"
 
     @model_validator(mode="before")
     @classmethod
@@ -102,14 +126,25 @@ class Settings(BaseSettings):
             raise ValueError("llm_retry_count must be <= 10")
         return v
 
-    def get_valid_api_keys(self) -> set[str]:
-        """返回合法 API Key 集合。"""
-        if not self.api_keys or not self.api_keys.strip():
-            return set()
-        return {k.strip() for k in self.api_keys.split(",") if k.strip()}
+    @cached_property
+    def _valid_api_keys(self) -> frozenset[str]:
+        """解析一次 api_keys 并缓存；配置在进程内不可变，无需每个请求重新 split。"""
+        # 预编译正则按「周边空白 + 逗号」切分，替代逐元素 split + strip 的
+        # 2N 次 Python 字符串操作；空串 split 出 [""]，被过滤掉
+        return frozenset(k for k in _API_KEYS_RE.split(self.api_keys.strip()) if k)
+
+    def get_valid_api_keys(self) -> frozenset[str]:
+        """返回合法 API Key 集合（首次调用后缓存）。"""
+        return self._valid_api_keys
+
+    @cached_property
+    def data_output_root(self) -> Path:
+        """解析一次输出根目录并缓存；Path.resolve 每次都要走一遍 realpath 系统调用。"""
+        return Path(self.data_output_dir).resolve()
 
-    @property
+    @cached_property
     def is_production(self) -> bool:
+        # 注意：model_copy 会连同已缓存的值一起拷贝，派生变体前不要先访问
         return self.env == "production"
 
 
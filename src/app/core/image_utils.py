@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import hashlib
+import shutil
 import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple
+from types import MappingProxyType
+from typing import Mapping, Tuple
 import os
 
 from app.observability.logging import get_logger
@@ -16,6 +20,79 @@ try:
 except ImportError:
     Image = None  # type: ignore[misc, assignment]
 
+# 内容哈希压缩缓存：同一张图（内容 + 压缩参数相同）只解码/编码一次。
+# 内存映射 (digest, max_size, quality) -> 缓存文件路径，命中时省掉磁盘 stat。
+_compress_cache: dict[tuple[str, int, int], str] = {}
+
+
+def _image_cache_dir() -> Path:
+    """压缩结果缓存目录：<data_output_dir>/image_cache。"""
+    from app.core.config import get_settings
+
+    d = Path(get_settings().data_output_dir).resolve() / "image_cache"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def _hash_file(path: Path) -> str:
+    """分块计算源文件 sha256，避免一次性读入整图。"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_lookup(digest: str, max_size: int, quality: int) -> Path | None:
+    """查找缓存的压缩结果，内存命中优先，其次磁盘。"""
+    key = (digest, max_size, quality)
+    cached = _compress_cache.get(key)
+    if cached and os.path.isfile(cached):
+        return Path(cached)
+    # 输出格式（jpg/png）在解码后才确定，两种候选都查
+    stem = _image_cache_dir() / f"{digest}_{max_size}_{quality}"
+    for ext in (".jpg", ".png"):
+        candidate = Path(f"{stem}{ext}")
+        if candidate.is_file():
+            _compress_cache[key] = str(candidate)
+            return candidate
+    return None
+
+
+def _cache_store(digest: str, max_size: int, quality: int, result: Path) -> None:
+    """将压缩结果硬链接（失败则复制）进缓存目录；缓存失败不影响主流程。"""
+    try:
+        target = _image_cache_dir() / f"{digest}_{max_size}_{quality}{result.suffix.lower()}"
+        if not target.exists():
+            try:
+                os.link(result, target)
+            except OSError:
+                shutil.copy2(result, target)
+        _compress_cache[(digest, max_size, quality)] = str(target)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("image_cache_store_failed", path=str(result), error=str(exc))
+
+
+def _already_standard(path: Path, max_size: int, size_threshold: int) -> bool:
+    """头部快速检查：已是合规 JPEG 时整条解码/编码链路都可以跳过。
+
+    Image.open 只解析文件头（SOF 标记），不触发像素解码，代价在微秒级；
+    判定失败或文件异常时返回 False，走正常压缩路径。
+    """
+    if size_threshold <= 0:
+        return False
+    try:
+        if path.stat().st_size > size_threshold:
+            return False
+        with Image.open(path) as im:
+            return (
+                im.format == "JPEG"
+                and im.mode in ("RGB", "L")
+                and (max_size <= 0 or max(im.size) <= max_size)
+            )
+    except Exception:  # noqa: BLE001
+        return False
+
 
 def compress_image_to_standard(
     image_path: Path,
@@ -23,6 +100,7 @@ def compress_image_to_standard(
     quality: int,
     *,
     output_path: Path | None = None,
+    size_threshold: int = 0,
 ) -> Path:
     """将图片按标准分辨率压缩后写入目标路径。
 
@@ -34,6 +112,8 @@ def compress_image_to_standard(
         max_size: 长边最大像素，0 表示不缩放。
         quality: JPEG/WebP 质量 1–100。
         output_path: 输出路径；不传则覆盖原文件（先写临时文件再替换）。
+        size_threshold: 体积阈值（字节）。原图已是 JPEG、长边不超限且体积
+            不超过该阈值时直接原样使用，跳过重编码；0 表示总是重编码。
 
     Returns:
         压缩后的图片路径（与 output_path 一致或原路径）。
@@ -49,10 +129,27 @@ def compress_image_to_standard(
     if not path.is_file():
         raise FileNotFoundError(f"图片不存在: {path}")
 
+    # 快速路径：用户上传已压缩好的小尺寸 JPEG 时（最常见情况），
+    # 连内容哈希都不必算，原图直接交付
+    if output_path is None and _already_standard(path, max_size, size_threshold):
+        logger.debug("image_compress_skipped_fast_path", path=str(path))
+        return path
+
     out = Path(output_path).resolve() if output_path else path
     out.parent.mkdir(parents=True, exist_ok=True)
 
+    # 命中缓存：直接交付缓存结果，跳过整条 PIL 解码/缩放/编码链路
+    digest = _hash_file(path)
+    cached = _cache_lookup(digest, max_size, quality)
+    if cached is not None:
+        return _deliver_cached(cached, path, out if output_path else None)
+
     with Image.open(path) as im:
+        # JPEG shrink-on-load：在 IDCT 阶段直接按 1/2、1/4、1/8 降采样到
+        # 长边仍 ≥ max_size 的最小尺寸，避免先整图解码再丢弃约 90% 的像素。
+        # draft 仅对 JPEG 生效，且须在任何触发 load 的操作（如 convert）之前调用。
+        if max_size > 0 and im.format == "JPEG" and max(im.size) > max_size:
+            im.draft(None, (max_size, max_size))
         im = _normalize_mode(im)
         w, h = im.size
 
@@ -60,38 +157,75 @@ def compress_image_to_standard(
             im, (w, h) = _resize_long_edge(im, max_size)
 
         # 有透明通道则 PNG，否则 JPEG 以控制质量与体积
-        use_png = im.mode == "RGBA"
-        save_kw: dict = {}
-        if use_png:
-            fmt, ext = "PNG", ".png"
-        else:
-            fmt, ext = "JPEG", ".jpg"
-            save_kw["quality"] = min(100, max(1, quality))
-            save_kw["optimize"] = True
+        fmt, ext, save_kw = _save_params(im.mode, quality)
 
         if not output_path:
-            # 覆盖原文件：先写临时文件再替换，扩展名可能变为 .jpg/.png
-            suffix = ext
-            fd, tmp = tempfile.mkstemp(suffix=suffix, prefix="xhs_compress_")
+            # 覆盖原文件：同目录临时文件 + os.replace 原子替换。
+            # 同一文件系统内 rename 不做数据拷贝，且不存在“原文件已删、
+            # 新文件未就位”的竞态窗口；扩展名可能变为 .jpg/.png
+            fd, tmp = tempfile.mkstemp(suffix=ext, prefix="xhs_compress_", dir=path.parent)
+            tmp_path = Path(tmp)
             try:
-                tmp_path = Path(tmp)
-                im.save(tmp_path, fmt, **save_kw)
-                dest = path.with_suffix(suffix)
-                if path.resolve() != dest.resolve():
-                    path.unlink(missing_ok=True)
-                tmp_path.replace(dest)
-            finally:
-                # 关闭文件描述符，避免泄漏
-                os.close(fd)
-            return path.with_suffix(suffix)
+                with os.fdopen(fd, "wb") as tmp_file:
+                    im.save(tmp_file, fmt, **save_kw)
+                dest = path.with_suffix(ext)
+                os.replace(tmp_path, dest)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            if dest != path:
+                # 扩展名变化时，确认替换成功后再移除旧文件
+                path.unlink(missing_ok=True)
+            _cache_store(digest, max_size, quality, dest)
+            return dest
 
         out_str = str(out)
         if not out_str.lower().endswith((".jpg", ".jpeg", ".png")):
             out = out.with_suffix(ext)
         im.save(out, fmt, **save_kw)
+        _cache_store(digest, max_size, quality, out)
         return out
 
 
+@lru_cache(maxsize=16)
+def _save_params(mode: str, quality: int) -> tuple[str, str, Mapping]:
+    """按 (mode, quality) 缓存保存参数，批量压缩时省掉逐图的 dict 构造。
+
+    返回只读 Mapping，避免调用方意外修改缓存条目。
+    """
+    if mode == "RGBA":
+        return "PNG", ".png", MappingProxyType({})
+    return "JPEG", ".jpg", MappingProxyType(
+        {"quality": min(100, max(1, quality)), "optimize": True}
+    )
+
+
+def _deliver_cached(cached: Path, path: Path, out: Path | None) -> Path:
+    """将缓存的压缩结果复制到目标位置，语义与正常压缩路径一致。
+
+    Args:
+        cached: 缓存目录中的压缩结果。
+        path: 原始图片路径。
+        out: 显式输出路径；None 表示覆盖原文件（扩展名按缓存格式调整）。
+    """
+    ext = cached.suffix
+    if out is None:
+        dest = path.with_suffix(ext)
+        if not (dest.exists() and os.path.samefile(cached, dest)):
+            shutil.copy2(cached, dest)
+        if path != dest:
+            path.unlink(missing_ok=True)
+        logger.debug("image_compress_cache_hit", src=str(path), dest=str(dest))
+        return dest
+
+    if not str(out).lower().endswith((".jpg", ".jpeg", ".png")):
+        out = out.with_suffix(ext)
+    if not (out.exists() and os.path.samefile(cached, out)):
+        shutil.copy2(cached, out)
+    logger.debug("image_compress_cache_hit", src=str(path), dest=str(out))
+    return out
+
+
 def _normalize_mode(im: "Image.Image") -> "Image.Image":
     """转为 RGB 或 RGBA，便于统一保存为 JPEG/PNG。"""
     if im.mode in ("RGB", "RGBA", "L"):
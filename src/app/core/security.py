@@ -1,28 +1,44 @@
 """API Key 校验与鉴权逻辑。"""
 
+import hmac
+
 from fastapi import Header, HTTPException, status
 
 from app.core.config import get_settings
 
+# 启动时绑定一次配置与合法 Key 集合，热路径上省掉每请求的函数调用与属性查找；
+# 测试覆盖配置时直接 patch 这两个模块级常量
+_SETTINGS = get_settings()
+_VALID_KEYS = _SETTINGS.get_valid_api_keys()
+
+
+def _key_matches(candidate: str, valid_keys: frozenset[str]) -> bool:
+    """常数时间比较候选 Key：遍历全部合法 Key，避免提前退出泄露时序信息。"""
+    encoded = candidate.encode("utf-8")
+    matched = False
+    for key in valid_keys:
+        if hmac.compare_digest(encoded, key.encode("utf-8")):
+            matched = True
+    return matched
+
 
 async def verify_api_key(x_api_key: str | None = Header(None, alias="X-API-Key")) -> str:
     """
     校验请求头中的 X-API-Key。
     若配置了 APP_API_KEYS 则必须携带且匹配；未配置时（开发）不强制校验。
     """
-    settings = get_settings()
-    valid_keys = settings.get_valid_api_keys()
+    valid_keys = _VALID_KEYS
 
     if not valid_keys:
         # 未配置合法 Key 时，仅开发环境允许无 Key 或任意 Key
-        if settings.is_production:
+        if _SETTINGS.is_production:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Server misconfiguration: no API keys configured",
             )
         return x_api_key or "dev-no-key"
 
-    if not x_api_key or x_api_key not in valid_keys:
+    if not x_api_key or not _key_matches(x_api_key, valid_keys):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
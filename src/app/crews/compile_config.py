@@ -0,0 +1,32 @@
+"""配置预编译入口：把 config/ 下的 YAML 编译为同名 .pkl。
+
+部署/构建阶段执行 `python -m app.crews.compile_config`，运行期加载
+（app.crews.xhs_note._config）会优先读取 .pkl，免去每个 worker 冷启动时
+的 YAML 解析开销。.pkl 与源 YAML 同目录同名，过期（源文件更新）自动失效。
+"""
+
+from __future__ import annotations
+
+import pickle
+
+import yaml
+
+from app.crews.xhs_note._config import CONFIG_DIR, _Loader
+
+
+def compile_config_dir() -> list[str]:
+    """编译 CONFIG_DIR 下所有 YAML 文件，返回生成的 .pkl 文件名列表。"""
+    compiled: list[str] = []
+    for yaml_path in sorted(CONFIG_DIR.glob("*.yaml")):
+        with yaml_path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_Loader) or {}
+        pkl_path = yaml_path.with_suffix(".pkl")
+        with pkl_path.open("wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        compiled.append(pkl_path.name)
+    return compiled
+
+
+if __name__ == "__main__":
+    for name in compile_config_dir():
+        print(f"compiled: {name}")
@@ -1,11 +1,14 @@
 """LLM 模型参数与 Provider 配置。支持阿里云通义千问等。"""
 
+from functools import cache
+
 from app.core.config import get_settings
 from app.crews.llm.aliyun_llm import AliyunLLM
 
 __all__ = ["AliyunLLM", "get_llm"]
 
 
+@cache
 def get_llm(
     provider: str | None = None,
     model: str | None = None,
@@ -15,6 +18,9 @@ def get_llm(
     """
     根据配置返回 LLM 实例。当前仅支持 aliyun。
 
+    按入参缓存：相同配置的多个 Agent 复用同一实例（LLM 实例无会话状态），
+    从而共享底层 HTTP 连接池，省去逐 Agent 的客户端初始化。
+
     Args:
         provider: 不传则用 APP_LLM_PROVIDER
         model: 不传则用 APP_LLM_MODEL
@@ -3,11 +3,22 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import json
+from functools import lru_cache
 from typing import Any, Tuple
 
+import httpx
+import orjson
 import requests
 from crewai import BaseLLM
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 from app.core.config import get_settings
 from app.observability.logging import get_logger
@@ -15,6 +26,94 @@ from app.observability.logging import get_logger
 logger = get_logger(__name__)
 
 
+# 可重试的 HTTP 状态码：限流与暂时性服务端错误；501/505 等确定性失败不在内
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 同步回退路径的连接池：CrewAI 执行器在工作线程里同步调用 call()，每次都会
+# 新建一个一次性事件循环，共享 AsyncClient 的连接会挂在已关闭的旧循环上无法
+# 复用；requests.Session 与事件循环无关，keep-alive 在多次 call() 之间持续生效，
+# 省掉对 dashscope 的每次 TLS 握手（约 100–300ms）
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=50, pool_maxsize=50, max_retries=0))
+
+
+class _RetryableStatusError(RuntimeError):
+    """可重试的上游错误（5xx / 429），429 可携带 Retry-After 秒数。"""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After 头（秒数形式），无效或缺失返回 None。"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _redact_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """生成用于日志的消息副本：base64 图片正文替换为长度占位符。
+
+    多模态消息里的 data URL 可达数 MB，原样写进日志既拖慢序列化
+    又撑爆日志文件；仅在多模态 item 上做浅拷贝，文本消息原样引用。
+    """
+    out: list[dict[str, Any]] = []
+    for msg in messages:
+        content = msg.get("content")
+        if not isinstance(content, list):
+            out.append(msg)
+            continue
+        items: list[Any] = []
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "image_url":
+                url = (item.get("image_url") or {}).get("url", "")
+                items.append(
+                    {"type": "image_url", "image_url": {"url": f"<redacted:{len(url)} bytes>"}}
+                )
+            elif isinstance(item, dict) and item.get("type") == "image":
+                img = item.get("image", "")
+                items.append({"type": "image", "image": f"<redacted:{len(img)} bytes>"})
+            else:
+                items.append(item)
+        out.append({**msg, "content": items})
+    return out
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """重试分类器：5xx/429、超时与传输层错误可重试，4xx 不重试。"""
+    if isinstance(exc, _RetryableStatusError):
+        return True
+    if isinstance(exc, (httpx.HTTPStatusError, requests.HTTPError)):
+        return False
+    return isinstance(exc, (httpx.HTTPError, requests.RequestException))
+
+
+@lru_cache
+def get_http_client() -> httpx.AsyncClient:
+    """返回进程内共享的异步 HTTP 客户端（HTTP/2 + keep-alive 连接池）。
+
+    所有 LLM 请求复用同一个客户端，避免每次调用重建 TCP/TLS 连接；
+    应用关闭时由 FastAPI lifespan 调用 aclose_http_client 释放。
+    """
+    settings = get_settings()
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=settings.llm_timeout,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+
+
+async def aclose_http_client() -> None:
+    """关闭共享 HTTP 客户端并清除缓存（供应用 lifespan 关闭时调用）。"""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+
+
 class AliyunLLM(BaseLLM):
     """阿里云通义千问 LLM，兼容 CrewAI BaseLLM 接口，支持多模态消息。"""
 
@@ -54,6 +153,11 @@ class AliyunLLM(BaseLLM):
             raise ValueError(
                 "阿里云 API Key 未配置。请设置环境变量 APP_LLM_API_KEY 或在构造时传入 api_key"
             )
+        # 请求头在实例生命周期内不变，构造一次避免每次请求（含重试）重建 dict
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
         region = region or settings.llm_region
         if region not in self.ENDPOINTS:
@@ -114,7 +218,7 @@ class AliyunLLM(BaseLLM):
                 }
                 logger.debug(
                     "normalized_multimodal_tool_result user_msg=%s",
-                    user_msg,
+                    _redact_messages([user_msg])[0],
                 )
                 out.append(user_msg)
                 flag = True
@@ -150,10 +254,53 @@ class AliyunLLM(BaseLLM):
         available_functions: dict[str, Any] | None = None,
         max_iterations: int = 10,
         _retry_on_empty: bool = True,
+        _skip_validation: bool = False,
+        **kwargs: Any,
+    ) -> str | Any:
+        """同步调用入口：在一次性事件循环里执行异步路径，HTTP 走同步连接池。
+
+        CrewAI 的执行器在工作线程中同步调用本方法；真正的管线全部在 acall 中
+        实现。这里每次 asyncio.run 的事件循环都是一次性的，故改用与事件循环
+        无关的 _SESSION（requests 连接池）收发 HTTP，keep-alive 才能跨调用生效。
+        """
+        coro = self.acall(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            max_iterations=max_iterations,
+            _retry_on_empty=_retry_on_empty,
+            _skip_validation=_skip_validation,
+            _use_sync_transport=True,
+            **kwargs,
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # 当前线程已有事件循环在运行（同步接口被误用于 async 上下文）：
+        # 在独立线程中执行，避免阻塞或嵌套事件循环
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+    async def acall(
+        self,
+        messages: str | list[dict[str, Any]],
+        tools: list[dict] | None = None,
+        callbacks: list[Any] | None = None,
+        available_functions: dict[str, Any] | None = None,
+        max_iterations: int = 10,
+        _retry_on_empty: bool = True,
+        _skip_validation: bool = False,
+        _use_sync_transport: bool = False,
         **kwargs: Any,
     ) -> str | Any:
-        """调用阿里云 Chat Completions API，支持 Function Calling 与多模态消息。"""
-        logger.debug("llm_call", messages=messages, tools=tools, callbacks=callbacks, available_functions=available_functions, max_iterations=max_iterations, _retry_on_empty=_retry_on_empty, **kwargs)
+        """异步调用阿里云 Chat Completions API，支持 Function Calling 与多模态消息。
+
+        使用共享的 httpx.AsyncClient（HTTP/2 + keep-alive 连接池），
+        单个事件循环即可复用连接并发多路 LLM 请求，不再占用线程池。
+        """
+        logger.debug("llm_call", tools=tools, callbacks=callbacks, available_functions=available_functions, max_iterations=max_iterations, _retry_on_empty=_retry_on_empty, **kwargs)
         if max_iterations <= 0:
             raise RuntimeError("Function calling 达到最大迭代次数，可能存在无限循环")
 
@@ -162,7 +309,10 @@ class AliyunLLM(BaseLLM):
 
         # 将 AddImageToolLocal 的字符串结果还原为多模态消息，并根据是否包含图片决定模型
         messages, used_multimodal = self._normalize_multimodal_tool_result(messages)
-        self._validate_messages(messages)
+        # 内部递归（function calling / 空内容重试）传入的消息已校验过，
+        # 长对话下无需对整个列表做 O(n) 重复校验
+        if not _skip_validation:
+            self._validate_messages(messages)
 
         payload: dict[str, Any] = {
             "model": self.model,
@@ -189,102 +339,56 @@ class AliyunLLM(BaseLLM):
                     except Exception:
                         pass
 
-        logger.debug(
+        logger.info(
             "llm_request",
             endpoint=self.endpoint,
             model=payload.get("model"),
             region=self.region,
             num_messages=len(messages),
-            raw_messages=messages,
         )
-
-        # 重试逻辑
-        last_exception = None
-        for attempt in range(self.retry_count + 1):  # 总共尝试 retry_count + 1 次
-            try:
-                response = requests.post(
-                    self.endpoint,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                    timeout=self.timeout,
-                )
-                
-                # 检查 HTTP 状态码，决定是否需要重试
-                status_code = response.status_code
-                if status_code >= 500:
-                    # 5xx 服务器错误，可以重试
-                    if attempt < self.retry_count:
-                        logger.warning(
-                            "llm_server_error_retry",
-                            status_code=status_code,
-                            attempt=attempt + 1,
-                            max_attempts=self.retry_count + 1,
-                        )
-                        last_exception = RuntimeError(f"LLM 服务器错误 {status_code}: {response.text[:200]}")
-                        continue
-                    else:
-                        response.raise_for_status()
-                elif status_code == 429:
-                    # 429 限流错误，可以重试
-                    if attempt < self.retry_count:
-                        logger.warning(
-                            "llm_rate_limit_retry",
-                            attempt=attempt + 1,
-                            max_attempts=self.retry_count + 1,
-                        )
-                        last_exception = RuntimeError(f"LLM 请求限流: {response.text[:200]}")
-                        continue
-                    else:
-                        response.raise_for_status()
-                elif status_code >= 400:
-                    # 其他 4xx 客户端错误，不重试
-                    response.raise_for_status()
-                
-                # 请求成功
-                result = response.json()
-                if attempt > 0:
+        # 消息正文仅在 DEBUG 级别输出，且图片 base64 替换为长度占位符
+        logger.debug("llm_request_messages", raw_messages=_redact_messages(messages))
+
+        # 同步入口（call）传入一次性事件循环时改用 _SESSION，见 call 的说明
+        client = None if _use_sync_transport else get_http_client()
+
+        # 重试逻辑：tenacity 指数退避 + 抖动，429 时优先遵循 Retry-After
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.retry_count + 1),
+                wait=self._retry_wait,
+                retry=retry_if_exception(_is_retryable),
+                before_sleep=self._log_retry,
+                reraise=True,
+            ):
+                with attempt:
+                    result = await self._request_once(client, payload)
+                if attempt.retry_state.attempt_number > 1:
                     logger.info(
                         "llm_request_success_after_retry",
-                        attempt=attempt + 1,
+                        attempt=attempt.retry_state.attempt_number,
                         total_attempts=self.retry_count + 1,
                     )
-                logger.debug("llm_response", result=result)  # 使用 debug 级别记录详细响应
-                break
-                
-            except requests.Timeout:
-                last_exception = TimeoutError(f"LLM 请求超时（{self.timeout} 秒）")
-                if attempt < self.retry_count:
-                    logger.warning(
-                        "llm_timeout_retry",
-                        timeout=self.timeout,
-                        attempt=attempt + 1,
-                        max_attempts=self.retry_count + 1,
-                    )
-                    continue
-                else:
-                    logger.error("llm_timeout_final", timeout=self.timeout, total_attempts=self.retry_count + 1)
-                    raise last_exception
-            except requests.RequestException as e:
-                last_exception = RuntimeError(f"LLM 请求失败: {e}")
-                if attempt < self.retry_count:
-                    logger.warning(
-                        "llm_request_error_retry",
-                        error=str(e),
-                        attempt=attempt + 1,
-                        max_attempts=self.retry_count + 1,
-                    )
-                    continue
-                else:
-                    logger.exception("llm_request_failed", error=str(e), total_attempts=self.retry_count + 1)
-                    raise last_exception
-        else:
-            # 所有重试都失败了
-            if last_exception:
-                raise last_exception
-            raise RuntimeError("LLM 请求失败：未知错误")
+        except (httpx.TimeoutException, requests.Timeout):
+            logger.error(
+                "llm_timeout_final", timeout=self.timeout, total_attempts=self.retry_count + 1
+            )
+            raise TimeoutError(f"LLM 请求超时（{self.timeout} 秒）") from None
+        except (httpx.HTTPStatusError, requests.HTTPError):
+            # 4xx 客户端错误，不重试，直接抛出
+            raise
+        except (httpx.HTTPError, requests.RequestException) as e:
+            logger.exception(
+                "llm_request_failed", error=str(e), total_attempts=self.retry_count + 1
+            )
+            raise RuntimeError(f"LLM 请求失败: {e}") from e
+        except _RetryableStatusError as e:
+            logger.error(
+                "llm_request_failed", error=str(e), total_attempts=self.retry_count + 1
+            )
+            raise
+
+        logger.debug("llm_response", result=result)  # 使用 debug 级别记录详细响应
 
         if callbacks:
             for cb in callbacks:
@@ -301,12 +405,13 @@ class AliyunLLM(BaseLLM):
         # 模型按 function call 返回时：content 常为空字符串，真实内容在 tool_calls 里，走 _handle_function_calls 处理
         if "tool_calls" in message:
             if available_functions:
-                return self._handle_function_calls(
+                return await self._handle_function_calls(
                     message["tool_calls"],
                     messages,
                     tools,
                     available_functions,
                     max_iterations - 1,
+                    _use_sync_transport=_use_sync_transport,
                 )
             raise ValueError(
                 "响应包含 tool_calls 但未提供 available_functions，无法执行工具调用"
@@ -332,20 +437,22 @@ class AliyunLLM(BaseLLM):
                     retry_count=retry_count + 1,
                     max_retries=max_empty_retries,
                 )
-                return self.call(
+                return await self.acall(
                     messages,
                     tools=tools,
                     callbacks=callbacks,
                     available_functions=available_functions,
                     max_iterations=max_iterations,
                     _retry_on_empty=False,
+                    _skip_validation=True,
+                    _use_sync_transport=_use_sync_transport,
                     _empty_retry_count=retry_count + 1,
                     **kwargs,
                 )
             raise ValueError(
                 "LLM 返回空内容，可能是模型限流或偶发异常，请稍后重试或检查 API 配额"
             )
-        
+
         logger.info(
             "llm_response",
             endpoint=self.endpoint,
@@ -354,13 +461,68 @@ class AliyunLLM(BaseLLM):
         )
         return content
 
-    def _handle_function_calls(
+    async def _request_once(
+        self, client: httpx.AsyncClient | None, payload: dict[str, Any]
+    ) -> dict[str, Any]:
+        """发起单次 Chat Completions 请求，按状态码分类抛出可/不可重试错误。
+
+        client 为 None 时走同步回退路径：阻塞的 Session.post 放入线程执行，
+        不占用事件循环；两种 Response 的状态码/头/正文接口一致，分类逻辑共用。
+        """
+        # orjson 序列化：多模态消息（base64 图片）体积大，C 实现显著快于 stdlib json
+        if client is None:
+            response: Any = await asyncio.to_thread(
+                _SESSION.post,
+                self.endpoint,
+                headers=self._headers,
+                data=orjson.dumps(payload),
+                timeout=self.timeout,
+            )
+        else:
+            response = await client.post(
+                self.endpoint,
+                headers=self._headers,
+                content=orjson.dumps(payload),
+                timeout=self.timeout,
+            )
+        status_code = response.status_code
+        if status_code in _RETRY_STATUSES:
+            if status_code == 429:
+                raise _RetryableStatusError(
+                    f"LLM 请求限流: {response.text[:200]}",
+                    retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                )
+            raise _RetryableStatusError(f"LLM 服务器错误 {status_code}: {response.text[:200]}")
+        if status_code >= 400:
+            response.raise_for_status()
+        return orjson.loads(response.content)
+
+    def _retry_wait(self, retry_state: Any) -> float:
+        """重试等待策略：429 带 Retry-After 时遵循服务端指示，否则指数退避 + 抖动。"""
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return wait_exponential_jitter(initial=1, max=30)(retry_state)
+
+    def _log_retry(self, retry_state: Any) -> None:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        logger.warning(
+            "llm_request_retry",
+            error=str(exc),
+            attempt=retry_state.attempt_number,
+            max_attempts=self.retry_count + 1,
+            wait_seconds=round(retry_state.upcoming_sleep or 0, 2),
+        )
+
+    async def _handle_function_calls(
         self,
         tool_calls: list[dict],
         messages: list[dict[str, Any]],
         tools: list[dict] | None,
         available_functions: dict[str, Any],
         max_iterations: int,
+        _use_sync_transport: bool = False,
     ) -> str | Any:
         """处理 Function Calling 递归调用。"""
         if max_iterations <= 0:
@@ -401,33 +563,15 @@ class AliyunLLM(BaseLLM):
                     "content": f"函数 {fn_name} 不可用",
                 })
 
-        return self.call(messages, tools, None, available_functions, max_iterations - 1)
-
-    async def acall(
-        self,
-        messages: str | list[dict[str, Any]],
-        tools: list[dict] | None = None,
-        callbacks: list[Any] | None = None,
-        available_functions: dict[str, Any] | None = None,
-        max_iterations: int = 10,
-        _retry_on_empty: bool = True,
-        **kwargs: Any,
-    ) -> str | Any:
-        """异步调用阿里云 Chat Completions API。
-        
-        通过在线程池中执行同步的 call 方法来实现异步，避免阻塞事件循环。
-        """
-        # 使用 asyncio.to_thread 在线程池中执行同步的 call 方法
-        # 这样可以复用现有的 call 实现，无需重写异步 HTTP 请求逻辑
-        return await asyncio.to_thread(
-            self.call,
+        # 新追加的 assistant/tool 消息结构由本方法自行构造，无需重新校验全量历史
+        return await self.acall(
             messages,
-            tools=tools,
-            callbacks=callbacks,
-            available_functions=available_functions,
-            max_iterations=max_iterations,
-            _retry_on_empty=_retry_on_empty,
-            **kwargs,
+            tools,
+            None,
+            available_functions,
+            max_iterations - 1,
+            _skip_validation=True,
+            _use_sync_transport=_use_sync_transport,
         )
 
     def supports_function_calling(self) -> bool:
@@ -7,12 +7,15 @@
 from __future__ import annotations
 
 import base64
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from app.core.config import get_settings
 from app.core.image_utils import compress_image_to_standard
 from app.observability.logging import get_logger
 
@@ -27,10 +30,64 @@ class AddImageToolLocalSchema(BaseModel):
         description="The URL or local file path of the image to add.",
     )
 
-#  编码函数： 将本地文件转换为 Base64 编码的字符串
-def _encode_image(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+# 分块大小取 3 的倍数（57 KiB），各块编码结果拼接后与整体编码一致，不会出现块间 padding
+_B64_CHUNK_SIZE = 57 * 1024
+
+# 扩展名 → MIME 类型；未知扩展名按 JPEG 处理
+_MIME_BY_SUFFIX: dict[str, str] = {
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+
+#  编码函数： 将本地文件转换为 Base64 Data URL 字符串
+def _encode_image(image_path, mime: str) -> str:
+    """分块读取并编码，峰值内存只保留编码输出，省掉整图字节的一次完整拷贝。
+
+    data URL 前缀直接写进同一个缓冲区：若由调用方 f-string 拼接，
+    会为了加 20 来个字节的前缀把整个 Base64 负载再复制一遍。
+
+    一次性顺序读取用原始 fd（os.open/os.read），跳过 open() 的
+    BufferedReader 分配与缓冲层拷贝；输出长度恰为前缀 + ceil(n/3)*4，
+    据 fstat 一次性分配缓冲区，逐块写入不再触发扩容 realloc。
+    """
+    prefix = f"data:{mime};base64,".encode("ascii")
+    fd = os.open(image_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        out = bytearray(len(prefix) + ((size + 2) // 3) * 4)
+        mv = memoryview(out)
+        mv[: len(prefix)] = prefix
+        pos = len(prefix)
+        while chunk := os.read(fd, _B64_CHUNK_SIZE):
+            encoded = base64.b64encode(chunk)
+            end = pos + len(encoded)
+            mv[pos:end] = encoded
+            pos = end
+    finally:
+        os.close(fd)
+    mv.release()
+    # Base64 输出是纯 ASCII，decode("ascii") 跳过 UTF-8 校验；
+    # 文件在 fstat 与读取之间被截短时按实际写入量裁剪
+    if pos == len(out):
+        return out.decode("ascii")
+    return out[:pos].decode("ascii")
+
+@lru_cache(maxsize=128)
+def _cached_data_url(path_str: str, mtime_ns: int, size: int) -> str:
+    """按 (路径, mtime, 大小) 缓存编码结果。
+
+    一次 xhs_note 流程中视觉分析与图片编辑两个 Agent 会对同一张图各调一次
+    本工具；文件未变时直接复用 data URL，免去重复的整图读取与 Base64 编码。
+    mtime_ns + size 参与键值，文件被覆盖后缓存自动失效。
+    """
+    mime = _MIME_BY_SUFFIX.get(Path(path_str).suffix.lower(), "image/jpeg")
+    return _encode_image(path_str, mime)
+
 
 def _local_path_to_base64_data_url(image_url: str) -> str | None:
     """将本地图片路径读取为 Base64 Data URL。
@@ -52,25 +109,12 @@ def _local_path_to_base64_data_url(image_url: str) -> str | None:
 
     try:
         # 统一压缩到较小尺寸，兼顾质量与体积
-        
-        b64 = _encode_image(path)
-
-        suffix = path.suffix.lower()
-        mime = "image/jpeg"
-        if suffix == ".png":
-            mime = "image/png"
-        elif suffix == ".gif":
-            mime = "image/gif"
-        elif suffix == ".webp":
-            mime = "image/webp"
-        elif suffix == ".bmp":
-            mime = "image/bmp"
-
-        data_url = f"data:{mime};base64,{b64}"
+
+        stat = path.stat()
+        data_url = _cached_data_url(str(path), stat.st_mtime_ns, stat.st_size)
         logger.info(
             "AddImageToolLocal.encode_success",
-            b64_len=len(b64),
-            mime=mime,
+            data_url_len=len(data_url),
         )
         return data_url
     except Exception as exc:  # noqa: BLE001
@@ -109,6 +153,15 @@ class AddImageToolLocal(BaseTool):
             logger.debug("AddImageToolLocal.remote_url", url=url)
             return url
 
+        # file_uri 模式：下游为可直接读本地文件的进程内模型时，
+        # 返回 file:// 引用即可，整条 Base64 编码链路都可跳过
+        if get_settings().image_tool_mode == "file_uri":
+            path = Path(url).expanduser().resolve()
+            if not path.is_file():
+                logger.warning("AddImageToolLocal.file_not_found", image_url=url)
+                return f"图片文件不存在: {url}"
+            return f"file://{path}"
+
         data_url = _local_path_to_base64_data_url(url)
         # data_url 为 None 的情况理论上只在异常中返回，这里做兜底
         return data_url if data_url is not None else url
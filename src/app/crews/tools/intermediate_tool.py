@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-import json
 from typing import Any
 
+import orjson
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field, field_validator
 
@@ -13,6 +13,24 @@ from app.observability.logging import get_logger
 logger = get_logger(__name__)
 
 
+def _dict_to_string(v: dict) -> str:
+    # orjson 紧凑输出：比 stdlib 的缩进编码快数倍，且少占 LLM 上下文 Token；
+    # orjson 原生输出 UTF-8，无需 ensure_ascii=False
+    try:
+        return orjson.dumps(v).decode()
+    except (TypeError, ValueError):
+        return str(v)
+
+
+# 按精确类型分发的转换表：工具每次调用都要走这条路径，
+# 一次 type() 哈希查找比逐个 isinstance 判断更省；子类再走 isinstance 兜底
+_CONVERTERS: dict[type, Any] = {
+    str: lambda v: v,
+    list: lambda v: "\n".join(map(str, v)),
+    dict: _dict_to_string,
+}
+
+
 class IntermediateToolSchema(BaseModel):
     """中间结果保存工具的输入。"""
 
@@ -29,15 +47,16 @@ class IntermediateToolSchema(BaseModel):
     @classmethod
     def convert_to_string(cls, v: Any) -> str:
         """将任意类型转为字符串：str 原样，list 用换行连接，dict 用 JSON，其余 str()。"""
+        fn = _CONVERTERS.get(type(v))
+        if fn is not None:
+            return fn(v)
+        # 精确类型未命中时按 isinstance 处理子类（如 OrderedDict、str 子类）
         if isinstance(v, str):
             return v
         if isinstance(v, list):
             return "\n".join(str(item) for item in v)
         if isinstance(v, dict):
-            try:
-                return json.dumps(v, ensure_ascii=False, indent=2)
-            except (TypeError, ValueError):
-                return str(v)
+            return _dict_to_string(v)
         return str(v)
 
 
@@ -10,12 +10,10 @@ Agent 的角色文案（role/goal/backstory 等）配置在 `app/crews/config/ag
 
 from __future__ import annotations
 
-from pathlib import Path
-
-import yaml
 from crewai import Agent
 
 from app.crews.llm import get_llm
+from app.crews.xhs_note._config import load_yaml_config
 from app.crews.tools import IntermediateTool, AddImageToolLocal
 from app.schemas.xhs_note import (
     XhsContentStrategyBrief,
@@ -28,17 +26,10 @@ from app.schemas.xhs_note import (
 
 _INTERMEDIATE_TOOLS = [IntermediateTool()]
 
-_CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
-
 
 def _load_agents_config() -> dict:
-    """从 agents.yaml 读取全部 Agent 文案与通用配置。"""
-    try:
-        with (_CONFIG_DIR / "agents.yaml").open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-            return data if isinstance(data, dict) else {}
-    except FileNotFoundError:
-        return {}
+    """从 agents.yaml 读取全部 Agent 文案与通用配置（共享缓存，仅解析一次）。"""
+    return load_yaml_config("agents.yaml")
 
 
 _AGENTS_CFG = _load_agents_config()
@@ -48,6 +39,13 @@ def _agent_cfg(name: str) -> dict:
     return _AGENTS_CFG.get(name, {}) if isinstance(_AGENTS_CFG, dict) else {}
 
 
+# 注意：Agent 是可变执行状态而非静态配置，不能进程内缓存复用。
+# kickoff 会在实例上原地绑定 crew 并换入当前任务的 prompt/tools，
+# executor 的 messages 列表还会跨调用累积——共享实例会让并发的逐图
+# 流水线互相串改 prompt，并把历史请求的上下文泄漏进后续 LLM 调用。
+# 真正值得缓存的是 YAML 解析（_AGENTS_CFG），Agent 每次调用新建。
+
+
 # 多模态视觉分析 Agent：除 llm/tools/multimodal 外全部走 config
 def get_xhs_visual_analyst() -> Agent:
     """每次调用创建一个新的视觉分析 Agent 实例。"""
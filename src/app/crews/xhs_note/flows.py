@@ -4,10 +4,11 @@
 
 对比原始实现：
 - 之前：使用一个 Crew，内部是“批处理” Task（一次性处理全部图片），按顺序执行；
-- 现在：按照图片拆分为多个异步任务：
-  1）每张图片一个视觉分析 Task，并发执行；
-  2）在拿到视觉分析结果后，每张图片一个编辑方案 Task，并发执行；
-  3）将所有图片的分析与编辑方案汇总，再顺序执行内容策划、内容撰写、搜索优化，生成最终报告。
+- 现在：按照图片拆分为逐图流水线：
+  1）每张图片一条「视觉分析 -> 编辑方案」流水线，该图分析一完成立即启动编辑方案，
+     不等待其他图片；各流水线之间并发执行（信号量限流）；
+  2）全部流水线完成后，并发执行视觉分析汇总与编辑方案汇总两个总结任务；
+  3）再顺序执行内容策划、内容撰写、搜索优化，生成最终报告。
 """
 
 from __future__ import annotations
@@ -58,25 +59,32 @@ from app.schemas.xhs_note import (
 logger = get_logger(__name__)
 
 def _generate_final_report(idea_request: XhsNoteIdeaRequest, edit_batch: XhsImageEditBatchReport, xhsSEOOptimizedNote: XhsSEOOptimizedNote) -> str:
-    """生成最终报告。"""
-    report = ""
-    report += f"原始创作意图: {idea_request.idea_text}\n"
-    report += f"生成笔记标题: {xhsSEOOptimizedNote.optimized_title}\n"
-    report += f"生成笔记正文: {xhsSEOOptimizedNote.optimized_content}\n"
-    report += f"生成笔记图片顺序: {xhsSEOOptimizedNote.optimized_picture_order}\n"
-    report += f"生成笔记标签: {xhsSEOOptimizedNote.tags}\n"
-    report += "生成笔记图片编辑方案: \n"
-    for img in edit_batch.images_edit_plan:
-        report += f"图片ID: {img.image_id}\n"
-        report += f"图片编辑方案: {img.overall_edit_strategy}\n"
-        report += f"图片剪裁建议: {img.crop_suggestion}\n"
-        report += f"图片亮度/对比度/饱和度调整建议: {img.light_color_adjustment}\n"
-        report += f"图片滤镜建议: {img.filter_suggestion}\n"
-        report += f"图片文字建议: {img.text_overlay_suggestion}\n"
-        report += f"图片美颜建议: {img.beauty_adjustment_suggestion}\n"
-        report += f"图片是否建议作为首图: {img.is_recommended_as_cover}\n"
-        report += f"图片需要规避的审美风险/平台审核风险: {img.risk_and_pitfall_notes}\n"
-    return report
+    """生成最终报告。
+
+    头部与每张图各拼成一条多行 f-string（格式在编译期固化，无运行时模板
+    解析），再一次 join：相比逐字段 append，多图长报告少一个数量级的
+    list 操作与小字符串分配，也避免逐段 += 的平方级拷贝。
+    """
+    header = (
+        f"原始创作意图: {idea_request.idea_text}\n"
+        f"生成笔记标题: {xhsSEOOptimizedNote.optimized_title}\n"
+        f"生成笔记正文: {xhsSEOOptimizedNote.optimized_content}\n"
+        f"生成笔记图片顺序: {xhsSEOOptimizedNote.optimized_picture_order}\n"
+        f"生成笔记标签: {xhsSEOOptimizedNote.tags}\n"
+        "生成笔记图片编辑方案: \n"
+    )
+    return header + "".join(
+        f"图片ID: {img.image_id}\n"
+        f"图片编辑方案: {img.overall_edit_strategy}\n"
+        f"图片剪裁建议: {img.crop_suggestion}\n"
+        f"图片亮度/对比度/饱和度调整建议: {img.light_color_adjustment}\n"
+        f"图片滤镜建议: {img.filter_suggestion}\n"
+        f"图片文字建议: {img.text_overlay_suggestion}\n"
+        f"图片美颜建议: {img.beauty_adjustment_suggestion}\n"
+        f"图片是否建议作为首图: {img.is_recommended_as_cover}\n"
+        f"图片需要规避的审美风险/平台审核风险: {img.risk_and_pitfall_notes}\n"
+        for img in edit_batch.images_edit_plan
+    )
 
 def _handle_crew_error(exc: Exception, agent_roles: list[str]) -> None:
     """统一处理Crew执行错误：记录指标和日志。
@@ -97,149 +105,166 @@ def _get_tasks_agents(tasks: List[Task]) -> List[Agent]:
         agents.append(task.agent)
     return agents
 
-# ============================================================================
-# Step 1：为每张图片创建「视觉分析」任务（并发执行）
-# ============================================================================
-
 
-async def _run_visual_analysis_phase(
-    idea_request: XhsNoteIdeaRequest,
-) -> Tuple[Dict[str, XhsImageVisualAnalysis], str]:
-    """并发执行所有图片的视觉分析，返回按 image_id 索引的结果字典。"""
-    if not idea_request.images:
-        return {}, ""
+async def _run_single_task_crew(
+    task: Task,
+    sem: asyncio.Semaphore,
+    agent_roles: list[str],
+    log_path: str,
+    timeout: int,
+):
+    """在独立的单任务 Crew 中执行一个 Task，带并发上限与统一超时。
 
-    tasks: List[Task] = []
-    # 为每张图片构建一个独立的视觉分析 Task，实现“多图并发分析”
-    for img in idea_request.images:
-        tasks.append(build_visual_analysis_task(img, idea_request.idea_text))
-    if not tasks:
-        return {}, ""
-    summary_task = build_visual_analysis_summary_task(tasks)
-    tasks.append(summary_task)
-    agents = _get_tasks_agents(tasks)
+    Crew 的 sequential 过程内部没有并发选项，逐图任务放进同一个 Crew 会串行
+    执行；改为每张图一个 Crew、外层 asyncio.gather 并发调度，由信号量限制
+    同时在途的 LLM 请求数（APP_MAX_CONCURRENT_IMAGE_TASKS）。
 
-
-    # 单个 Crew 内部仍然是 sequential，但外层通过 async_execution=True + akickoff
-    # 来实现整体上的并发 IO 调度
+    log_path 与 timeout 由上层按流程算好一次传入，避免每个任务重复查配置。
+    """
     crew = Crew(
-        agents=agents,
-        tasks=tasks,
+        agents=[task.agent],
+        tasks=[task],
         process=Process.sequential,
         verbose=True,
-        output_log_file=get_crew_log_file_path(get_settings().log_dir),
+        output_log_file=log_path,
     )
-
-    try:
-        
-        settings = get_settings()
-        timeout = settings.crew_execution_timeout
-
-        # 使用 asyncio.wait_for 为 Crew 执行增加超时控制，避免任务“卡死”
-        result = await asyncio.wait_for(crew.akickoff(), timeout=timeout)
-    except Exception as exc:  # noqa: BLE001
-        _handle_crew_error(exc, ["xhs_visual_analyst"])
-        raise
-
-    # 将结果按 image_id 索引，方便后续阶段快速关联
-    visual_by_id: Dict[str, XhsImageVisualAnalysis] = {}
+    async with sem:
+        try:
+            # asyncio.timeout 作用于当前任务，不像 wait_for 那样额外包一层 Task
+            async with asyncio.timeout(timeout):
+                return await crew.akickoff()
+        except Exception as exc:  # noqa: BLE001
+            _handle_crew_error(exc, agent_roles)
+            raise
+
+
+def _summary_text(result) -> str:
+    """提取汇总 Crew 最后一个 TaskOutput 的原始字符串。"""
     tasks_output = getattr(result, "tasks_output", []) or []
-    
-    # 提取每张图片的视觉分析结果（跳过最后一个 summary task）
-    for task_output in tasks_output[:-1] if len(tasks_output) > 1 else tasks_output:
-        visual = getattr(task_output, "pydantic", None)
-        if isinstance(visual, XhsImageVisualAnalysis):
-            visual_by_id[visual.image_id] = visual
-    
-    # summary task 是最后一个任务，提取其输出字符串
-    visual_summary = ""
-    if tasks_output:
-        # summary task 的输出在最后一个 task_output 中
-        summary_output = tasks_output[-1]
-        # TaskOutput 的 raw 属性包含原始字符串输出
-        visual_summary = getattr(summary_output, "raw", "") or ""
-        if not isinstance(visual_summary, str):
-            # 如果不是字符串，尝试转换为字符串
-            visual_summary = str(visual_summary)
-
-    logger.info(
-        "xhs_note_visual_phase_done",
-        image_count=len(idea_request.images),
-        visual_result=visual_by_id,
-    )
-    return visual_by_id, visual_summary
-
+    if not tasks_output:
+        return ""
+    raw = getattr(tasks_output[-1], "raw", "") or ""
+    return raw if isinstance(raw, str) else str(raw)
 
 # ============================================================================
-# Step 2：为每张图片创建「编辑方案」任务（并发执行）
+# Step 1+2：逐图「视觉分析 -> 编辑方案」流水线（各图并发，图内两步衔接）
 # ============================================================================
 
 
-async def _run_image_edit_phase(
-    idea_request: XhsNoteIdeaRequest,
-    visual_by_id: Dict[str, XhsImageVisualAnalysis],
-) -> Tuple[Dict[str, XhsImageEditPlan], str]:
-    """并发执行所有图片的编辑方案任务，返回按 image_id 索引的结果字典。"""
-    tasks: List[Task] = []
-    # 仅为“视觉分析已成功”的图片创建编辑方案任务
-    for img in idea_request.images:
-        visual = visual_by_id.get(img.image_id)
-        if not visual:
-            continue
-        # 这里需要携带用户意图 + 图片基础信息 + 视觉分析结果
-        tasks.append(build_image_edit_task(idea_request.idea_text, img, visual))
-
-    if not tasks:
-        return {}, ""
-    
-    summary_task = build_image_edit_plan_summary_task(tasks)
-    tasks.append(summary_task)
+def _first_pydantic(result, model: type):
+    """从 Crew 结果中提取第一个指定类型的结构化输出。"""
+    for task_output in getattr(result, "tasks_output", []) or []:
+        value = getattr(task_output, "pydantic", None)
+        if isinstance(value, model):
+            return value
+    return None
 
-    crew = Crew(
-        agents=_get_tasks_agents(tasks),
-        tasks=tasks,
-        process=Process.sequential,
-        verbose=True,
-        output_log_file=get_crew_log_file_path(get_settings().log_dir),
+
+async def _analyze_then_edit(
+    img,
+    idea_text: str,
+    sem: asyncio.Semaphore,
+    log_path: str,
+    timeout: int,
+) -> Tuple[Task, XhsImageVisualAnalysis | None, Task | None, XhsImageEditPlan | None]:
+    """单张图片的流水线：视觉分析一完成立即启动该图的编辑方案任务。
+
+    不同图片的分析耗时差异很大，流水线衔接让最快图片的编辑方案与
+    最慢图片的视觉分析重叠执行，而不是等全部分析完成后再整体进入下一阶段。
+    """
+    visual_task = build_visual_analysis_task(img, idea_text)
+    visual_result = await _run_single_task_crew(
+        visual_task, sem, ["xhs_visual_analyst"], log_path, timeout
     )
+    visual = _first_pydantic(visual_result, XhsImageVisualAnalysis)
+    if visual is None:
+        # 视觉分析未产出结构化结果：跳过该图的编辑方案
+        return visual_task, None, None, None
+
+    edit_task = build_image_edit_task(idea_text, img, visual)
+    edit_result = await _run_single_task_crew(
+        edit_task, sem, ["xhs_image_editor"], log_path, timeout
+    )
+    plan = _first_pydantic(edit_result, XhsImageEditPlan)
+    return visual_task, visual, edit_task, plan
 
-    try:
-        # 添加超时控制，防止图片编辑方案阶段长时间阻塞
-        settings = get_settings()
-        timeout = settings.crew_execution_timeout
 
-        result = await asyncio.wait_for(crew.akickoff(), timeout=timeout)
-    except Exception as exc:  # noqa: BLE001
-        _handle_crew_error(exc, ["xhs_image_editor"])
-        raise
+async def _run_image_phases_pipelined(
+    idea_request: XhsNoteIdeaRequest,
+) -> Tuple[Dict[str, XhsImageVisualAnalysis], str, Dict[str, XhsImageEditPlan], str]:
+    """并发执行全部逐图流水线，最后并发跑两个汇总任务。
 
-    # 将编辑方案结果按 image_id 索引
-    edit_by_id: Dict[str, XhsImageEditPlan] = {}
-    tasks_output = getattr(result, "tasks_output", []) or []
-    
-    # 提取每张图片的编辑方案结果（跳过最后一个 summary task）
-    for task_output in tasks_output[:-1] if len(tasks_output) > 1 else tasks_output:
-        plan = getattr(task_output, "pydantic", None)
-        if isinstance(plan, XhsImageEditPlan):
-            edit_by_id[plan.image_id] = plan
-    
-    # summary task 是最后一个任务，提取其输出字符串
-    edit_summary = ""
-    if tasks_output:
-        # summary task 的输出在最后一个 task_output 中
-        summary_output = tasks_output[-1]
-        # TaskOutput 的 raw 属性包含原始字符串输出
-        edit_summary = getattr(summary_output, "raw", "") or ""
-        if not isinstance(edit_summary, str):
-            # 如果不是字符串，尝试转换为字符串
-            edit_summary = str(edit_summary)
+    Returns:
+        (visual_by_id, visual_summary, edit_by_id, edit_summary)
+    """
+    if not idea_request.images:
+        return {}, "", {}, ""
+
+    # 配置与日志路径按流程计算一次，逐图任务直接复用
+    settings = get_settings()
+    log_path = get_crew_log_file_path(settings.log_dir)
+    timeout = settings.crew_execution_timeout
+
+    sem = asyncio.Semaphore(settings.max_concurrent_image_tasks)
+    # TaskGroup 提供结构化取消：任一流水线失败时其余流水线立即取消
+    async with asyncio.TaskGroup() as tg:
+        futs = [
+            tg.create_task(
+                _analyze_then_edit(img, idea_request.idea_text, sem, log_path, timeout)
+            )
+            for img in idea_request.images
+        ]
+    rows = [fut.result() for fut in futs]
+
+    visual_tasks = [row[0] for row in rows]
+    visual_by_id: Dict[str, XhsImageVisualAnalysis] = {
+        row[1].image_id: row[1] for row in rows if row[1] is not None
+    }
+    edit_tasks = [row[2] for row in rows if row[2] is not None]
+    edit_by_id: Dict[str, XhsImageEditPlan] = {
+        row[3].image_id: row[3] for row in rows if row[3] is not None
+    }
+
+    # 两个汇总任务互不依赖，并发执行；context 引用的 Task 已执行完毕、输出已就位
+    async with asyncio.TaskGroup() as tg:
+        visual_summary_fut = tg.create_task(
+            _run_single_task_crew(
+                build_visual_analysis_summary_task(visual_tasks),
+                sem,
+                ["xhs_visual_analyst"],
+                log_path,
+                timeout,
+            )
+        )
+        edit_summary_fut = (
+            tg.create_task(
+                _run_single_task_crew(
+                    build_image_edit_plan_summary_task(edit_tasks),
+                    sem,
+                    ["xhs_image_editor"],
+                    log_path,
+                    timeout,
+                )
+            )
+            if edit_tasks
+            else None
+        )
+    visual_summary = _summary_text(visual_summary_fut.result())
+    edit_summary = _summary_text(edit_summary_fut.result()) if edit_summary_fut else ""
 
+    # INFO 只记数量与 ID；完整结构化结果体积大（含整段视觉描述），降到 DEBUG
     logger.info(
-        "xhs_note_edit_phase_done",
+        "xhs_note_image_phases_done",
         image_count=len(idea_request.images),
+        visual_ids=list(visual_by_id),
+        edit_ids=list(edit_by_id),
+    )
+    logger.debug(
+        "xhs_note_image_phases_result",
+        visual_result=visual_by_id,
         edit_result=edit_by_id,
     )
-    return edit_by_id, edit_summary
+    return visual_by_id, visual_summary, edit_by_id, edit_summary
 
 
 # ============================================================================
@@ -258,29 +283,29 @@ async def _run_content_phase(
     copywriting_task = get_task_copywriting(content_strategy_task)
     seo_task = get_task_seo_optimization(content_strategy_task, copywriting_task)
 
+    # 配置只查一次，供日志路径与超时共用
+    settings = get_settings()
+    timeout = settings.crew_execution_timeout
+
     crew = Crew(
         agents=_get_tasks_agents([content_strategy_task, copywriting_task, seo_task]),
         tasks=[content_strategy_task, copywriting_task, seo_task],
         process=Process.sequential,
         verbose=True,
-        output_log_file=get_crew_log_file_path(get_settings().log_dir),
+        output_log_file=get_crew_log_file_path(settings.log_dir),
     )
 
     try:
-        settings = get_settings()
-        timeout = settings.crew_execution_timeout
-
         # 下游内容相关任务依赖上游图像阶段的聚合报告，这里通过 inputs 传入 JSON 字符串
-        result = await asyncio.wait_for(
-            crew.akickoff(
+        async with asyncio.timeout(timeout):
+            result = await crew.akickoff(
                 inputs={
                     "idea_text": idea_request.idea_text,
-                    "visual_report": visual_batch.model_dump_json(indent=2),
-                    "edit_report": edit_batch.model_dump_json(indent=2),
+                    # 紧凑 JSON：缩进会让报告体积近乎翻倍，既慢又多耗 LLM Token
+                    "visual_report": visual_batch.model_dump_json(),
+                    "edit_report": edit_batch.model_dump_json(),
                 }
-            ),
-            timeout=timeout,
-        )
+            )
 
         # 约定 tasks_output 顺序分别为：内容策略、原始文案、SEO 优化
         strategy_brief: XhsContentStrategyBrief = result.tasks_output[0].pydantic
@@ -324,32 +349,35 @@ async def run_xhs_note_flow(
         return None, "本次请求未上传任何图片"
 
     try:
-        # Step 1：全部图片视觉分析（并发）
-        visual_by_id, visual_summary = await _run_visual_analysis_phase(idea_request)
-
-        # Step 2：全部图片编辑方案（并发）
-        edit_by_id, edit_summary = await _run_image_edit_phase(idea_request, visual_by_id)
-
-        # 将逐图结果汇总为批次报告 + 每图完整信息
-        images_visual: List[XhsImageVisualAnalysis] = []
-        images_edit_plan: List[XhsImageEditPlan] = []
-
-        for img in idea_request.images:
-            visual = visual_by_id.get(img.image_id)
-            plan = edit_by_id.get(img.image_id)
-            if not (visual and plan):
-                continue
-            images_visual.append(visual)
-            images_edit_plan.append(plan)
-            
-
-        visual_batch = XhsVisualBatchReport(
+        # Step 1+2：逐图流水线 —— 每张图视觉分析一完成立即启动编辑方案
+        visual_by_id, visual_summary, edit_by_id, edit_summary = (
+            await _run_image_phases_pipelined(idea_request)
+        )
+
+        # 将逐图结果汇总为批次报告 + 每图完整信息：
+        # 两阶段都成功的 image_id 恰为两个字典键集的交集，按请求中的图片顺序输出
+        common = visual_by_id.keys() & edit_by_id.keys()
+        images_visual: List[XhsImageVisualAnalysis] = [
+            visual_by_id[img.image_id]
+            for img in idea_request.images
+            if img.image_id in common
+        ]
+        images_edit_plan: List[XhsImageEditPlan] = [
+            edit_by_id[img.image_id]
+            for img in idea_request.images
+            if img.image_id in common
+        ]
+
+
+        # 子模型均出自 CrewAI output_pydantic 的校验结果，聚合时无需再整树
+        # 校验一遍，model_construct 直接按字段赋值
+        visual_batch = XhsVisualBatchReport.model_construct(
             user_raw_intent=idea_request.idea_text,
             images_visual=images_visual,
             summary=visual_summary,
         )
 
-        edit_batch = XhsImageEditBatchReport(
+        edit_batch = XhsImageEditBatchReport.model_construct(
             images_edit_plan=images_edit_plan,
             summary=edit_summary,
         )
@@ -372,8 +400,9 @@ async def run_xhs_note_flow(
             "xhs_note_flow_success",
             image_count=len(images_edit_plan),
             duration_seconds=round(duration, 2),
-            final_report=final_report,
+            report_length=len(final_report),
         )
+        logger.debug("xhs_note_flow_report", final_report=final_report)
         return final_report, ""
 
     except Exception as exc:  # noqa: BLE001
@@ -9,12 +9,11 @@ Task描述统一从 `app/crews/config/tasks.yaml` 加载，支持变量替换。
 from __future__ import annotations
 
 import json
-from pathlib import Path
 from typing import List, Tuple
 
-import yaml
 from crewai import Task, Agent
 
+from app.crews.xhs_note._config import load_yaml_config
 from app.crews.xhs_note.agents import (
     get_xhs_content_writer,
     get_xhs_growth_strategist,
@@ -34,30 +33,27 @@ from app.schemas.xhs_note import (
     XhsVisualBatchReport,
 )
 
-_CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
-
-
 def _load_tasks_config() -> dict:
-    """从 tasks.yaml 读取全部 Task 配置。"""
-    try:
-        with (_CONFIG_DIR / "tasks.yaml").open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-            return data if isinstance(data, dict) else {}
-    except FileNotFoundError:
-        return {}
-    except yaml.YAMLError as e:
-        # YAML解析失败时记录错误但不中断程序
-        from app.observability.logging import get_logger
-        logger = get_logger(__name__)
-        logger.error("tasks_yaml_load_failed", error=str(e))
-        return {}
+    """从 tasks.yaml 读取全部 Task 配置（走包级共享的缓存加载器）。"""
+    return load_yaml_config("tasks.yaml")
 
 
 _TASKS_CFG = _load_tasks_config()
 
-def _get_task_config(task_name: str) -> dict:
-    """获取指定Task的配置。"""
-    return _TASKS_CFG.get(task_name, {}) if isinstance(_TASKS_CFG, dict) else {}
+# load_yaml_config 已保证返回 dict，直接绑定 dict.get 作为查询入口，
+# 省去每次 Task 构建时的包装函数调用与 isinstance 重复校验
+_get_task_config = _TASKS_CFG.get
+
+# 图片相关 Task 每张图都会构建一次，描述/产出模板是 YAML 常量，
+# 导入期一次性解出；必填键缺失时在导入阶段即报错，而非首次构建 Task 时
+_VA_CFG = _get_task_config("task_visual_analysis", {})
+_VA_DESC_TMPL: str = _VA_CFG["description"]
+_VA_EXPECTED: str = _VA_CFG["expected_output"]
+_IE_CFG = _get_task_config("task_image_edit_plan", {})
+_IE_DESC_TMPL: str = _IE_CFG["description"]
+_IE_EXPECTED: str = _IE_CFG["expected_output"]
+_VA_SUMMARY_CFG = _get_task_config("task_visual_analysis_summary", {})
+_IE_SUMMARY_CFG = _get_task_config("task_image_edit_plan_summary", {})
 
 
 def build_visual_analysis_task(image: XhsImageInput, idea_text: str) -> Task:
@@ -65,28 +61,23 @@ def build_visual_analysis_task(image: XhsImageInput, idea_text: str) -> Task:
 
     该函数负责把领域模型转换为 CrewAI 能理解的 Task 定义，文案模版统一来自 YAML 配置。
     """
-    cfg = _get_task_config("task_visual_analysis")
-    
     # 准备变量替换：这里只传入当前这张图片的信息
     images_json = json.dumps([{
         "image_id": image.image_id,
         "file_name": image.file_name,
         "local_path": image.local_path,
-    }], ensure_ascii=False, indent=2)
-    
-    # 使用YAML中的描述（仅 description），支持变量替换
-    description_template = cfg.get("description")
-    
-    description = description_template.format(
-        idea_text=idea_text,
-        images_info=images_json,
-    )
-    
-    expected_output = cfg.get("expected_output")
+    }], ensure_ascii=False)
+
+    # 使用YAML中的描述（仅 description），支持变量替换；
+    # format_map 直接消费 dict，省掉 **kwargs 的打包/解包
+    description = _VA_DESC_TMPL.format_map({
+        "idea_text": idea_text,
+        "images_info": images_json,
+    })
 
     return Task(
         description=description,
-        expected_output=expected_output,
+        expected_output=_VA_EXPECTED,
         agent=get_xhs_visual_analyst(),
         output_pydantic=XhsImageVisualAnalysis,
         async_execution=True,  # 异步执行，避免阻塞主线程
@@ -94,10 +85,9 @@ def build_visual_analysis_task(image: XhsImageInput, idea_text: str) -> Task:
 
 def build_visual_analysis_summary_task(context: List[Task]) -> Task:
     """基于多个视觉分析任务的结果构建视觉分析总结 Task。"""
-    cfg = _get_task_config("task_visual_analysis_summary")
     return Task(
-        description=cfg.get("description", ""),
-        expected_output=cfg.get("expected_output", ""),
+        description=_VA_SUMMARY_CFG.get("description", ""),
+        expected_output=_VA_SUMMARY_CFG.get("expected_output", ""),
         agent=get_xhs_visual_analyst(),
         context=context,
         async_execution=False,
@@ -113,28 +103,23 @@ def build_image_edit_task(
     注意：这里的入参顺序与 `flows.py` 中的调用保持严格一致：
     (idea_text, image, visual)，避免因位置参数错乱导致描述模板替换错误。
     """
-    # 从YAML加载配置
-    cfg = _get_task_config("task_image_edit_plan")
     images_info = json.dumps([{
         "image_id": image.image_id,
         "file_name": image.file_name,
         "local_path": image.local_path,
-    }], ensure_ascii=False, indent=2)
-    visual_analysis_info = visual.model_dump_json(indent=2)
-    # 使用YAML中的描述模板
-    description_template = cfg.get("description")
-    
-    description = description_template.format(
-        idea_text=idea_text,
-        images_info=images_info,
-        visual_analysis=visual_analysis_info
-    )
-    
-    expected_output = cfg.get("expected_output")
+    }], ensure_ascii=False)
+    visual_analysis_info = visual.model_dump_json()
+
+    # 使用YAML中的描述模板（format_map 同上，免 kwargs 开销）
+    description = _IE_DESC_TMPL.format_map({
+        "idea_text": idea_text,
+        "images_info": images_info,
+        "visual_analysis": visual_analysis_info,
+    })
 
     return Task(
         description=description,
-        expected_output=expected_output,
+        expected_output=_IE_EXPECTED,
         agent=get_xhs_image_editor(),
         output_pydantic=XhsImageEditPlan,
         async_execution=True,  # 异步执行，避免阻塞主线程
@@ -142,10 +127,9 @@ def build_image_edit_task(
 
 def build_image_edit_plan_summary_task(context: List[Task]) -> Task:
     """基于多个图片编辑方案任务的结果构建图片编辑方案总结 Task。"""
-    cfg = _get_task_config("task_image_edit_plan_summary")
     return Task(
-        description=cfg.get("description", ""),
-        expected_output=cfg.get("expected_output", ""),
+        description=_IE_SUMMARY_CFG.get("description", ""),
+        expected_output=_IE_SUMMARY_CFG.get("expected_output", ""),
         agent=get_xhs_image_editor(),
         context=context,
         async_execution=False,
@@ -154,7 +138,7 @@ def build_image_edit_plan_summary_task(context: List[Task]) -> Task:
 
 def get_task_content_strategy() -> Task:
     """从 YAML 配置构建内容策略 Task，每次调用返回新实例。"""
-    cfg = _get_task_config("task_content_strategy")
+    cfg = _get_task_config("task_content_strategy", {})
     return Task(
         description=cfg.get("description", ""),
         expected_output=cfg.get("expected_output", ""),
@@ -166,7 +150,7 @@ def get_task_content_strategy() -> Task:
 
 def get_task_copywriting(content_strategy_task: Task) -> Task:
     """基于内容策略 Task 构建文案撰写 Task，每次调用返回新实例。"""
-    cfg = _get_task_config("task_copywriting")
+    cfg = _get_task_config("task_copywriting", {})
     return Task(
         description=cfg.get("description", ""),
         expected_output=cfg.get("expected_output", ""),
@@ -182,7 +166,7 @@ def get_task_seo_optimization(
     copywriting_task: Task,
 ) -> Task:
     """基于内容策略和文案撰写 Task 构建 SEO 优化 Task，每次调用返回新实例。"""
-    cfg = _get_task_config("task_seo_optimization")
+    cfg = _get_task_config("task_seo_optimization", {})
     return Task(
         description=cfg.get("description", ""),
         expected_output=cfg.get("expected_output", ""),
@@ -1,35 +1,49 @@
 """本地文件客户端：路径隔离、异步 IO、防目录穿越。"""
 
+import asyncio
 import os
+from functools import lru_cache
 from pathlib import Path
 
-import aiofiles
-
 # 根目录锁定，防止目录穿越
 FILE_ROOT = Path(os.environ.get("APP_FILE_ROOT", "./data/files")).resolve()
 
 
+@lru_cache(maxsize=1024)
 def _safe_path(relative_path: str) -> Path:
-    """将相对路径解析为绝对路径，并确保在 FILE_ROOT 下。"""
+    """将相对路径解析为绝对路径，并确保在 FILE_ROOT 下。
+
+    resolve() 要对路径每一段做 stat，同一流程内热点文件会反复读写，
+    FILE_ROOT 进程内不变，按相对路径缓存解析结果即可省掉这串系统调用。
+    """
     p = (FILE_ROOT / relative_path).resolve()
-    if not str(p).startswith(str(FILE_ROOT)):
+    # is_relative_to 按路径段比较，不会把 /data/filesX 误判进 /data/files，
+    # 也省掉两次整串 str() 转换
+    if not p.is_relative_to(FILE_ROOT):
         raise ValueError("path outside allowed root")
     return p
 
 
+def _write(path: Path, content: bytes) -> None:
+    """同步写入：建目录 + 整文件写在同一个工作线程内完成。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
 async def read_file(relative_path: str) -> bytes:
-    """异步读取文件。"""
+    """异步读取文件。
+
+    整文件一次读取走 asyncio.to_thread：aiofiles 会把 open/read/close
+    拆成三次线程调度，to_thread 只需一次往返。
+    """
     path = _safe_path(relative_path)
-    async with aiofiles.open(path, "rb") as f:
-        return await f.read()
+    return await asyncio.to_thread(path.read_bytes)
 
 
 async def write_file(relative_path: str, content: bytes) -> None:
     """异步写入文件，父目录不存在则创建。"""
     path = _safe_path(relative_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    async with aiofiles.open(path, "wb") as f:
-        await f.write(content)
+    await asyncio.to_thread(_write, path, content)
 
 
 async def delete_file(relative_path: str) -> bool:
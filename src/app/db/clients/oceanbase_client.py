@@ -19,8 +19,12 @@ def get_engine():
             settings.database_url,
             echo=settings.database_echo,
             pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            # 定期回收连接，避免被 MySQL/OceanBase 服务端先行超时断开
+            pool_recycle=1800,
+            # LIFO 复用最近归还的热连接，冷连接自然老化后被回收
+            pool_use_lifo=True,
         )
     return _engine
 
@@ -48,8 +52,6 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 
 async def init_db() -> None:
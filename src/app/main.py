@@ -1,11 +1,9 @@
 """框架入口：FastAPI 初始化、中间件、全局异常处理、健康检查与 API 挂载。"""
 
-from uuid import uuid4
-
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -14,8 +12,8 @@ from slowapi.middleware import SlowAPIMiddleware
 from app.api.v1 import health
 from app.api.v1 import api_router
 from app.core.config import get_settings
-from app.observability.http_trace import http_trace_middleware
-from app.observability.logging import get_logger, set_request_id, get_request_id
+from app.observability.http_trace import TraceAndRequestIdMiddleware
+from app.observability.logging import configure_logging, get_logger, get_request_id
 from app.schemas.common import ErrorDetail
 
 logger = get_logger(__name__)
@@ -24,13 +22,42 @@ logger = get_logger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期：启动时初始化日志与配置，关闭时清理。"""
-    settings = get_settings()
-    from app.observability.logging import configure_logging
+    import asyncio
+    import os
 
+    settings = get_settings()
     configure_logging(settings.log_level, settings.log_dir)
+
+    # 预建 xhs_note 运行目录与回收站（同文件系统），请求尾的清理只需一次
+    # rename；顺手在后台线程清掉上次进程异常退出遗留的回收站内容
+    from app.services.xhs_note_service import sweep_trash_directory
+
+    os.makedirs(settings.data_output_root / "xhs_note", exist_ok=True)
+    os.makedirs(settings.data_output_root / "xhs_note_trash", exist_ok=True)
+    app.state.trash_sweep_task = asyncio.create_task(
+        asyncio.to_thread(sweep_trash_directory)
+    )
+
+    # 预热连接池：提前完成握手，首批请求不再付冷启动延迟
+    if settings.db_pool_prewarm > 0:
+        from app.db.clients.oceanbase_client import get_engine
+
+        engine = get_engine()
+        conns = [await engine.connect() for _ in range(settings.db_pool_prewarm)]
+        await asyncio.gather(*(c.close() for c in conns))
+        logger.info("db_pool_prewarmed", connections=settings.db_pool_prewarm)
+
     logger.info("application_started", env=settings.env, port=settings.port)
     yield
+    # 关闭 LLM 共享 HTTP 客户端，释放 keep-alive 连接
+    from app.crews.llm.aliyun_llm import aclose_http_client
+
+    await aclose_http_client()
     logger.info("application_shutdown")
+    # 最后停掉日志后台线程，冲刷队列中剩余的日志
+    from app.observability.logging import shutdown_logging
+
+    shutdown_logging()
 
 
 def create_application() -> FastAPI:
@@ -46,6 +73,8 @@ def create_application() -> FastAPI:
         description="企业级生成式 AI 应用 Web 服务框架",
         version="0.1.0",
         lifespan=lifespan,
+        # orjson 序列化大报告类响应（如小红书笔记报告）比 stdlib json 快数倍
+        default_response_class=ORJSONResponse,
         docs_url="/docs" if settings.env != "production" else None,
         redoc_url="/redoc" if settings.env != "production" else None,
     )
@@ -53,25 +82,9 @@ def create_application() -> FastAPI:
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
     app.add_middleware(SlowAPIMiddleware)
-
-    # 后注册的先执行：request_id 先注册，trace 后注册，故 trace 先执行，request_id 可读到 trace_id
-    @app.middleware("http")
-    async def request_id_middleware(request: Request, call_next):
-        rid = (
-            request.headers.get("X-Request-ID")
-            or getattr(request.state, "trace_id", None)
-            or str(uuid4())
-        )
-        set_request_id(rid)
-        request.state.request_id = rid
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = rid
-        return response
-
-    @app.middleware("http")
-    async def trace_middleware(request: Request, call_next):
-        """Trace 中间件：设置 trace_id/span_id，统一打印请求参数与返回结果（OpenTracing 兼容）。"""
-        return await http_trace_middleware(request, call_next)
+    # trace + request_id 合并为单个纯 ASGI 中间件（最后注册，最外层执行），
+    # 免去两层 BaseHTTPMiddleware 各自的 anyio 流与任务组开销
+    app.add_middleware(TraceAndRequestIdMiddleware)
 
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
@@ -1,13 +1,17 @@
 """HTTP 请求统一 Trace 中间件：记录请求参数、返回结果及 OpenTracing 上下文。"""
 
 import json
+import logging
+import random
 import time
 from typing import Any
 
 from fastapi import Request
-from starlette.requests import Request as StarletteRequest
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.observability.logging import get_logger
+from app.core.config import get_settings
+from app.observability.logging import get_logger, set_request_id
 from app.observability.trace import (
     build_traceparent,
     get_span_id,
@@ -39,92 +43,209 @@ def _truncate(s: str, max_len: int = MAX_BODY_LOG_LEN) -> str:
     return s[:max_len] + "...[truncated]"
 
 
-async def _get_request_body_for_log(request: Request) -> tuple[bytes, Request]:
+async def _capture_body_prefix(receive: Receive) -> tuple[bytes, Receive]:
     """
-    读取请求体并返回 (body_bytes, new_request)，new_request 的 receive 会返回已缓存的 body，
-    供后续路由正常读取。若未消费 body 则 new_request 即原 request。
-    """
-    # 仅对可能有 body 的方法尝试读取
-    if request.method not in ("POST", "PUT", "PATCH", "DELETE"):
-        return b"", request
-    try:
-        body_bytes = await request.body()
-    except Exception:
-        return b"", request
-
-    async def receive():
-        return {"type": "http.request", "body": body_bytes}
+    从原始 ASGI receive 读取请求体前缀用于日志预览，返回 (prefix, replay_receive)。
 
-    new_request = StarletteRequest(request.scope, receive)
-    return body_bytes, new_request
-
-
-def _body_preview(body_bytes: bytes) -> str | None:
-    """生成可打印的请求/响应体预览，JSON 则脱敏并截断。"""
+    最多缓冲 MAX_BODY_LOG_LEN+1 字节；replay_receive 先回放已缓冲的前缀，
+    之后继续转发原始消息，超出部分按需透传而不整体物化——大文件上传的
+    中间件内存占用被常数封顶。body 全部交付后，后续调用与 Starlette 自身
+    的 _CachedRequest 一致地回放空收尾消息，绝不等待已耗尽的原始 receive。
+    """
+    cap = MAX_BODY_LOG_LEN + 1
+    chunks: list[bytes] = []
+    received = 0
+    more_body = True
+    trailing: Message | None = None  # 读前缀期间收到的非 body 消息（如 http.disconnect）
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            trailing = message
+            break
+        chunks.append(message.get("body", b""))
+        received += len(chunks[-1])
+        if not message.get("more_body", False):
+            more_body = False
+            break
+        if received > cap:
+            # 预览已够用，剩余 body 留在原始 receive 里按需转发
+            break
+
+    prefix = b"".join(chunks)
+    replayed = False
+
+    async def replay_receive() -> Message:
+        nonlocal replayed, trailing, more_body
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": prefix, "more_body": more_body}
+        if trailing is not None:
+            message, trailing = trailing, None
+            return message
+        if more_body:
+            # 前缀之后确实还有数据，继续从原始 receive 转发
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                more_body = False
+            return message
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return prefix, replay_receive
+
+
+# 二进制类型不做任何预览，解码出来也只是乱码
+_SKIP_PREVIEW_CONTENT_TYPES = ("image/", "video/", "application/octet-stream")
+# 响应侧在此基础上连缓冲都跳过：SSE 等流式类型逐块到来，缓冲毫无意义
+_SKIP_RESPONSE_PREVIEW_CONTENT_TYPES = (*_SKIP_PREVIEW_CONTENT_TYPES, "text/event-stream")
+
+
+def _body_preview(body_bytes: bytes, content_type: str = "") -> str | None:
+    """生成可打印的请求/响应体预览，JSON 则脱敏并截断。
+
+    按 content_type 提前分流：二进制类型直接跳过，非 JSON 文本只截断不解析，
+    省掉对 multipart/HTML 等必然失败的 json.loads 全文扫描。
+    """
     if not body_bytes:
         return None
+    if content_type.startswith(_SKIP_PREVIEW_CONTENT_TYPES):
+        return None
+    text = body_bytes.decode("utf-8", errors="replace").strip()
+    if not text:
+        return None
+    # content_type 未知（如直接调用）时仍按 JSON 尝试，保持原有行为
+    if content_type and not content_type.startswith("application/json"):
+        return _truncate(text)
+    # 快速路径：全文一次 C 级子串扫描，不含任何敏感键名（绝大多数请求）
+    # 就直接截断返回，跳过 parse + 递归脱敏 + 重新序列化
+    lowered = text.lower()
+    if not any(k in lowered for k in SENSITIVE_KEYS):
+        return _truncate(text)
     try:
-        text = body_bytes.decode("utf-8", errors="replace").strip()
-        if not text:
-            return None
         obj = json.loads(text)
-        masked = _mask_sensitive(obj)
-        return _truncate(json.dumps(masked, ensure_ascii=False, default=str))
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return _truncate(body_bytes.decode("utf-8", errors="replace"))
+    except json.JSONDecodeError:
+        return _truncate(text)
+    return _truncate(json.dumps(_mask_sensitive(obj), ensure_ascii=False, default=str))
 
 
-async def http_trace_middleware(request: Request, call_next):
+class TraceAndRequestIdMiddleware:
     """
-    统一 Trace 中间件：解析/生成 trace_id/span_id，标准打印请求参数与返回结果，
-    并注入 W3C traceparent 响应头（符合 OpenTracing 生态）。
+    合并 request_id 与 trace 的纯 ASGI 中间件：解析/生成 trace_id/span_id，
+    绑定 request_id，标准打印请求参数与返回结果，并注入 X-Request-ID 与
+    W3C traceparent 响应头（符合 OpenTracing 生态）。
+
+    此前二者是两个 @app.middleware("http") 处理器，各被 BaseHTTPMiddleware
+    包一层（每请求一对 anyio 内存流 + 任务组）；合并为单个纯 ASGI 中间件后
+    这些开销全部消失，请求体前缀也能在原始 receive 上直接窥取并回放。
     """
-    # 1. 解析或生成 Trace 上下文，与 request_id 对齐
-    traceparent = request.headers.get("traceparent")
-    tid, parent_sid = parse_traceparent(traceparent)
-    trace_id, span_id = set_trace_context(trace_id=tid, parent_span_id=parent_sid or None)
-    request.state.trace_id = trace_id
-    request.state.span_id = span_id
-    # 与现有 request_id 对齐：若无 X-Request-ID 则用 trace_id 作为 request_id（在 main 里 set_request_id 会用 header 或 uuid，这里只设置 state，主入口用 trace_id 设 request_id 见 main）
-    # 此处仅设置 trace 上下文；request_id 仍在 main 的 request_id_middleware 里设置，我们保持 trace_id 与 request_id 可一致由 main 层统一用 trace_id 赋 request_id
-
-    # 2. 读取请求体并构造可被后续路由使用的 request
-    body_bytes, req_to_call = await _get_request_body_for_log(request)
-    query_params = dict(req_to_call.query_params) if req_to_call.query_params else None
-    request_preview = _body_preview(body_bytes)
-
-    # 3. 请求开始日志（OpenTracing 风格：trace_id, span_id）
-    logger.info(
-        "http_request_start",
-        method=req_to_call.method,
-        path=req_to_call.url.path,
-        query=query_params,
-        body_preview=request_preview,
-        trace_id=trace_id,
-        span_id=span_id,
-    )
-
-    start = time.perf_counter()
-    response = await call_next(req_to_call)
-    duration_ms = round((time.perf_counter() - start) * 1000, 2)
-
-    # 4. 响应体预览（仅对非流式、可读 body 的 Response）
-    response_preview = None
-    if hasattr(response, "body") and response.body:
-        response_preview = _body_preview(response.body)
-
-    # 5. 响应结束日志
-    logger.info(
-        "http_request_finish",
-        method=req_to_call.method,
-        path=req_to_call.url.path,
-        status_code=response.status_code,
-        duration_ms=duration_ms,
-        response_preview=response_preview,
-        trace_id=get_trace_id(),
-        span_id=get_span_id(),
-    )
-
-    # 6. 注入 W3C traceparent 响应头
-    response.headers["traceparent"] = build_traceparent(trace_id, span_id)
-    return response
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 1. 解析或生成 Trace 上下文；request_id 优先取 X-Request-ID，缺省与 trace_id 对齐
+        request = Request(scope)
+        tid, parent_sid = parse_traceparent(request.headers.get("traceparent"))
+        trace_id, span_id = set_trace_context(trace_id=tid, parent_span_id=parent_sid or None)
+        rid = request.headers.get("x-request-id") or trace_id
+        set_request_id(rid)
+        state = scope.setdefault("state", {})
+        state["request_id"] = rid
+        state["trace_id"] = trace_id
+        state["span_id"] = span_id
+
+        traceparent_value = build_traceparent(trace_id, span_id)
+
+        def inject_headers(message: Message) -> None:
+            headers = MutableHeaders(scope=message)
+            headers["X-Request-ID"] = rid
+            headers["traceparent"] = traceparent_value
+
+        # 生产环境 log_level 高于 INFO 时，整条 trace 日志链路都是无效功，
+        # 只保留上下文绑定与响应头注入，直接放行
+        if not logging.getLogger(__name__).isEnabledFor(logging.INFO):
+
+            async def send_headers_only(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    inject_headers(message)
+                await send(message)
+
+            await self.app(scope, receive, send_headers_only)
+            return
+
+        # 采样：未被采样的请求仍打 start/finish，但跳过 body 窥取与预览序列化
+        sampled = random.random() < get_settings().trace_sample_rate
+
+        # 2. 窥取请求体前缀（仅可能带 body 的方法），下游经 replay_receive 读到完整 body
+        downstream_receive = receive
+        request_preview = None
+        if sampled and request.method in ("POST", "PUT", "PATCH", "DELETE"):
+            prefix, downstream_receive = await _capture_body_prefix(receive)
+            request_preview = _body_preview(prefix, request.headers.get("content-type", ""))
+        query_params = dict(request.query_params) if request.query_params else None
+
+        # 3. 请求开始日志（OpenTracing 风格：trace_id, span_id）
+        logger.info(
+            "http_request_start",
+            method=request.method,
+            path=request.url.path,
+            query=query_params,
+            body_preview=request_preview,
+            trace_id=trace_id,
+            span_id=span_id,
+        )
+
+        start = time.perf_counter()
+        status_code = 0
+        response_content_type = ""
+        response_chunks: list[bytes] = []
+        response_len = 0
+        capture_response = sampled
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_content_type, response_len, capture_response
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                inject_headers(message)
+                headers = MutableHeaders(scope=message)
+                response_content_type = headers.get("content-type", "")
+                # 无 body 状态码、流式/二进制类型或明显超限的响应直接不做预览
+                if capture_response:
+                    content_length = headers.get("content-length", "")
+                    if (
+                        status_code in (204, 304)
+                        or response_content_type.startswith(_SKIP_RESPONSE_PREVIEW_CONTENT_TYPES)
+                        or (content_length.isdigit() and int(content_length) > MAX_BODY_LOG_LEN * 4)
+                    ):
+                        capture_response = False
+            elif message["type"] == "http.response.body":
+                # 4. 响应体预览：仅被采样请求缓冲前缀，超出上限不再累积
+                if capture_response and response_len <= MAX_BODY_LOG_LEN:
+                    chunk = message.get("body", b"")
+                    response_chunks.append(chunk)
+                    response_len += len(chunk)
+                if not message.get("more_body", False):
+                    duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                    response_preview = None
+                    if response_chunks:
+                        response_preview = _body_preview(
+                            b"".join(response_chunks), response_content_type
+                        )
+                    # 5. 响应结束日志
+                    logger.info(
+                        "http_request_finish",
+                        method=request.method,
+                        path=request.url.path,
+                        status_code=status_code,
+                        duration_ms=duration_ms,
+                        response_preview=response_preview,
+                        trace_id=get_trace_id(),
+                        span_id=get_span_id(),
+                    )
+            await send(message)
+
+        # 6. traceparent/X-Request-ID 响应头在 send_wrapper 中注入
+        await self.app(scope, downstream_receive, send_wrapper)
@@ -4,22 +4,28 @@
 import logging
 import logging.handlers
 import os
+import queue
 from contextvars import ContextVar
 from datetime import date
-from uuid import uuid4
+import secrets
 
 import structlog
 
+from app.observability.trace import get_span_id, get_trace_id
+
 
 request_id_ctx: ContextVar[str] = ContextVar("request_id", default="")
 
+# 后台日志监听线程（QueueListener），configure_logging 时启动、进程退出时停止
+_queue_listener: logging.handlers.QueueListener | None = None
+
 
 def get_request_id() -> str:
     return request_id_ctx.get() or ""
 
 
 def set_request_id(rid: str | None = None) -> str:
-    rid = rid or str(uuid4())
+    rid = rid or secrets.token_hex(16)
     request_id_ctx.set(rid)
     return rid
 
@@ -33,16 +39,10 @@ def add_request_id(logger: logging.Logger, method_name: str, event_dict: dict) -
 
 def add_trace_context(logger: logging.Logger, method_name: str, event_dict: dict) -> dict:
     """注入 OpenTracing 兼容的 trace_id、span_id 到每条日志。"""
-    try:
-        from app.observability.trace import get_trace_id, get_span_id
-        tid = get_trace_id()
-        sid = get_span_id()
-        if tid:
-            event_dict["trace_id"] = tid
-        if sid:
-            event_dict["span_id"] = sid
-    except Exception:
-        pass
+    if tid := get_trace_id():
+        event_dict["trace_id"] = tid
+    if sid := get_span_id():
+        event_dict["span_id"] = sid
     return event_dict
 
 
@@ -92,11 +92,21 @@ def configure_logging(log_level: str = "INFO", log_dir: str = "./logs") -> None:
     error_handler.setFormatter(formatter)
     error_handler.setLevel(logging.ERROR)
 
+    # 文件写入（含轮转时的 rename+reopen）移到后台线程：请求线程/事件循环上
+    # 只做一次无锁的队列投递，阻塞 I/O 不再出现在异步路径上
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, all_handler, error_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
+
     app_logger = logging.getLogger("app")
     app_logger.setLevel(level)  # 使用配置的日志级别，而不是硬编码 DEBUG
     app_logger.handlers.clear()
-    app_logger.addHandler(all_handler)
-    app_logger.addHandler(error_handler)
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     app_logger.propagate = False
 
     structlog.configure(
@@ -111,6 +121,14 @@ def configure_logging(log_level: str = "INFO", log_dir: str = "./logs") -> None:
     )
 
 
+def shutdown_logging() -> None:
+    """停止后台日志监听线程并冲刷剩余日志（应用关闭时调用）。"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     return structlog.get_logger(name)
 
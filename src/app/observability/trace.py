@@ -1,5 +1,6 @@
 """OpenTracing 兼容的 Trace 上下文：trace_id、span_id、W3C traceparent 解析与注入。"""
 
+import random
 import secrets
 from contextvars import ContextVar
 
@@ -11,9 +12,13 @@ trace_id_ctx: ContextVar[str] = ContextVar("trace_id", default="")
 span_id_ctx: ContextVar[str] = ContextVar("span_id", default="")
 parent_span_id_ctx: ContextVar[str] = ContextVar("parent_span_id", default="")
 
+# trace/span id 只求避免碰撞、不涉密，用进程内 PRNG 即可，省掉每个请求
+# 两次 os.urandom 熵读取；种子取自系统熵，getrandbits 单次调用受 GIL 保护
+_RNG = random.Random(secrets.token_bytes(32))
+
 
 def _random_hex(num_bytes: int) -> str:
-    return secrets.token_hex(num_bytes)
+    return _RNG.getrandbits(num_bytes * 8).to_bytes(num_bytes, "big").hex()
 
 
 def generate_trace_id() -> str:
@@ -78,9 +83,11 @@ def parse_traceparent(header_value: str | None) -> tuple[str | None, str | None]
     _version, tid, parent_sid, _flags = parts
     if len(tid) != 32 or len(parent_sid) != 16:
         return None, None
+    # bytes.fromhex 走 C 实现的十六进制解码校验，比 int(x, 16) 的
+    # 通用整数解析路径更快（长度已在上一步保证为偶数）
     try:
-        int(tid, 16)
-        int(parent_sid, 16)
+        bytes.fromhex(tid)
+        bytes.fromhex(parent_sid)
     except ValueError:
         return None, None
     return tid, parent_sid
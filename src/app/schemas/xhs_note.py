@@ -4,12 +4,19 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# 全部模型为只读值对象：frozen 防止中间结果被意外就地修改，
+# 也让实例可安全地跨协程/测试共享与哈希；defer_build 把 pydantic-core
+# 校验器的合成推迟到首次校验，import 时不再逐模型编译 core schema
+_FROZEN = ConfigDict(frozen=True, defer_build=True)
 
 
 class XhsImageInput(BaseModel):
     """服务端解析表单上传图片后生成的内部表示。"""
 
+    model_config = _FROZEN
+
     image_id: str = Field(..., description="服务端为每张上传图片分配的唯一标识，如 img_0。")
     file_name: str = Field(..., description="原始文件名。")
     local_path: str = Field(
@@ -20,6 +27,8 @@ class XhsImageInput(BaseModel):
 class XhsNoteIdeaRequest(BaseModel):
     """从表单解析后进入业务层 / 流程编排层的领域请求模型。"""
 
+    model_config = _FROZEN
+
     idea_text: str = Field(..., description="用户对笔记创作的自然语言描述 / 思路。")
     images: List[XhsImageInput] = Field(
         ..., description="本次上传参与分析与编辑的图片列表。"
@@ -29,6 +38,8 @@ class XhsNoteIdeaRequest(BaseModel):
 class XhsImageVisualAnalysis(BaseModel):
     """单张图片的视觉分析结果。"""
 
+    model_config = _FROZEN
+
     image_id: str = Field(..., description="图片唯一标识，对应 XhsImageInput.image_id。")
     file_name: str = Field(..., description="图片文件名。")
     subject_description: str = Field(..., description="主体内容客观描述。")
@@ -47,6 +58,8 @@ class XhsImageVisualAnalysis(BaseModel):
 class XhsImageEditPlan(BaseModel):
     """单张图片在小红书内置编辑器中的编辑 / P 图方案。"""
 
+    model_config = _FROZEN
+
     image_id: str = Field(..., description="图片唯一标识。")
     file_name: str = Field(..., description="图片文件名。")
     overall_edit_strategy: str = Field(
@@ -84,6 +97,8 @@ class XhsImageEditPlan(BaseModel):
 class XhsVisualBatchReport(BaseModel):
     """多张图片的视觉分析汇总报告。"""
 
+    model_config = _FROZEN
+
     user_raw_intent: str = Field(..., description="用户的原始文本意图。")
     images_visual: List[XhsImageVisualAnalysis] = Field(
         ..., description="所有图片的视觉分析结果列表。"
@@ -96,6 +111,8 @@ class XhsVisualBatchReport(BaseModel):
 class XhsImageEditBatchReport(BaseModel):
     """多张图片的编辑 / P 图方案汇总报告。"""
 
+    model_config = _FROZEN
+
     images_edit_plan: List[XhsImageEditPlan] = Field(
         ..., description="所有图片对应的小红书内置编辑方案列表。"
     )
@@ -107,6 +124,8 @@ class XhsImageEditBatchReport(BaseModel):
 class XhsContentStrategyBrief(BaseModel):
     """内容策略简报，由增长策略 Agent 产出。"""
 
+    model_config = _FROZEN
+
     input_evaluation: str = Field(
         ...,
         description="基于用户诉求和图片素材的综合评估，指出优势、劣势和修图建议。",
@@ -139,6 +158,8 @@ class XhsContentStrategyBrief(BaseModel):
 class XhsCopywritingOutput(BaseModel):
     """原始文案，由资深 MCN 内容编辑 Agent 产出。"""
 
+    model_config = _FROZEN
+
     title: str = Field(..., description="带 Emoji 的小红书标题。")
     content: str = Field(..., description="完整小红书笔记正文。")
     picture_order: List[str] = Field(
@@ -152,6 +173,8 @@ class XhsCopywritingOutput(BaseModel):
 class XhsSEOOptimizedNote(BaseModel):
     """SEO 优化后的笔记内容，由搜索优化 Agent 产出。"""
 
+    model_config = _FROZEN
+
     optimization_summary: str = Field(
         ..., description="本次 SEO 优化的要点与改动说明。"
     )
@@ -166,6 +189,8 @@ class XhsSEOOptimizedNote(BaseModel):
 class XhsImageWithPlans(BaseModel):
     """单张图片的完整信息：基础信息 + 分析 + 编辑方案。"""
 
+    model_config = _FROZEN
+
     base_info: XhsImageInput = Field(..., description="基础元信息。")
     visual_analysis: XhsImageVisualAnalysis = Field(
         ..., description="视觉分析结果。"
@@ -176,6 +201,8 @@ class XhsImageWithPlans(BaseModel):
 class XhsNoteFinalReport(BaseModel):
     """整体笔记撰写报告，供 API 直接返回。"""
 
+    model_config = _FROZEN
+
     idea_text: str = Field(..., description="原始创作意图文本。")
     strategy_brief: XhsContentStrategyBrief = Field(
         ..., description="内容策略简报。"
@@ -194,5 +221,7 @@ class XhsNoteFinalReport(BaseModel):
 class XhsNoteReportResponse(BaseModel):
     """顶层响应数据结构，便于与统一 ApiResponse 泛型结合。"""
 
+    model_config = _FROZEN
+
     report: str = Field(..., description="最终笔记撰写报告。")
 
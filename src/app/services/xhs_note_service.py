@@ -9,18 +9,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-import re
+import logging
+import os
 import shutil
-import uuid
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import aiofiles
 from fastapi import UploadFile
 
 from app.core.config import get_settings
 from app.core.image_utils import compress_image_to_standard
-from app.crews.xhs_note.flows import run_xhs_note_flow
 from app.observability.logging import get_logger
 from app.schemas.xhs_note import (
     XhsImageInput,
@@ -31,6 +32,30 @@ from app.schemas.xhs_note import (
 logger = get_logger(__name__)
 
 
+def __getattr__(name: str):
+    """PEP 562：首次访问 run_xhs_note_flow 时才导入 flows 及其背后的 CrewAI。
+
+    CrewAI 导入约需 2 秒；本模块随 app.main 被全量加载，延迟绑定让未触发
+    生成流程的进程（以及不涉及 Crew 的测试）不必付这笔启动成本。
+    测试里 patch("app.services.xhs_note_service.run_xhs_note_flow") 仍然有效：
+    patch 取原值时经由本函数完成首次绑定。
+    """
+    if name == "run_xhs_note_flow":
+        from app.crews.xhs_note.flows import run_xhs_note_flow
+
+        globals()["run_xhs_note_flow"] = run_xhs_note_flow
+        return run_xhs_note_flow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 上传落盘的流式分块大小（1 MiB）
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 路径分隔符 + 常见危险字符统一替换为下划线：预编译转换表后
+# str.translate 单次 C 级遍历即可完成，替代两次 replace 加一次 re.sub
+_FORBIDDEN_FILENAME_CHARS = frozenset('<>:"|?*/\\')
+_SANITIZE_TABLE = str.maketrans(dict.fromkeys(_FORBIDDEN_FILENAME_CHARS, "_"))
+
+
 def _sanitize_filename(filename: str, fallback_name: str, max_length: int = 255) -> str:
     """对上传文件名做安全处理，防止路径穿越和特殊字符导致的问题。
 
@@ -40,11 +65,17 @@ def _sanitize_filename(filename: str, fallback_name: str, max_length: int = 255)
         max_length: 允许的最大文件名长度
     """
     name = filename or fallback_name
-    # 去掉路径分隔符，避免路径穿越
-    name = name.replace("/", "_").replace("\\", "_")
-    # 过滤常见危险字符
-    name = re.sub(r'[<>:"|?*]', "_", name)
-    name = name.strip() or fallback_name
+    # 快速路径：文件名本来就干净（绝大多数上传），原样返回，
+    # 不经过 translate/strip 产生新字符串
+    if (
+        len(name) <= max_length
+        and not _FORBIDDEN_FILENAME_CHARS.intersection(name)
+        and not name[0].isspace()
+        and not name[-1].isspace()
+    ):
+        return name
+
+    name = name.translate(_SANITIZE_TABLE).strip() or fallback_name
 
     if len(name) <= max_length:
         return name
@@ -59,70 +90,131 @@ def _sanitize_filename(filename: str, fallback_name: str, max_length: int = 255)
     return stem[:remain] + suffix
 
 
+async def _save_one_image(
+    idx: int,
+    f: UploadFile,
+    base_dir: Path,
+    max_size: int,
+    quality: int,
+    size_threshold: int = 0,
+) -> XhsImageInput:
+    """保存单张上传图片并压缩，返回其 XhsImageInput 元信息。"""
+    # 使用递增序号作为 image_id，保证在本次请求中唯一
+    image_id = f"img_{idx}"
+    # 文件名优先使用上传名，缺失时退化为 image_id
+    raw_name = f.filename
+    fallback_name = f"{image_id}.jpg"
+    safe_name = _sanitize_filename(raw_name or "", fallback_name=fallback_name)
+    # 落盘名加 image_id 前缀：各图保存并发执行，上传名重复（两张都叫 photo.jpg）
+    # 时不会写到同一路径导致分块交叉写坏文件；file_name 元信息仍保留原始名
+    target_path = base_dir / f"{image_id}_{safe_name}"
+
+    # 以 1 MiB 分块把上传流式落盘，避免把整张多 MB 的照片先读进内存；
+    # 块大小取 1 MiB 以摊薄 asyncio 调度开销
+    async with aiofiles.open(target_path, "wb") as out:
+        while chunk := await f.read(_UPLOAD_CHUNK_SIZE):
+            await out.write(chunk)
+
+    # 默认认为压缩前后的路径相同；压缩成功后会被覆盖
+    local_path = target_path
+    try:
+        # 压缩是 CPU 密集型（PIL 解码/缩放/编码），放到线程池避免阻塞事件循环；
+        # Pillow 在 libjpeg/zlib 编解码时会释放 GIL，多图可真正并行
+        local_path = await asyncio.to_thread(
+            compress_image_to_standard,
+            target_path,
+            max_size=max_size,
+            quality=quality,
+            size_threshold=size_threshold,
+        )
+    except Exception as exc:  # noqa: BLE001
+        # 压缩失败只打日志，不中断整个请求，继续使用原图路径
+        logger.warning(
+            "xhs_image_compress_skipped",
+            path=str(target_path),
+            error=str(exc),
+        )
+
+    # 信任边界：三个字段全部由服务端代码生成（序号 id、已消毒文件名、
+    # 落盘路径），并非用户输入，model_construct 跳过无谓的字段校验
+    return XhsImageInput.model_construct(
+        image_id=image_id,
+        file_name=safe_name,
+        local_path=str(local_path),
+    )
+
+
 async def _save_uploaded_images(
     files: List[UploadFile],
     base_dir: Path,
     max_size: int,
     quality: int,
+    size_threshold: int = 0,
 ) -> List[XhsImageInput]:
-    """将上传的图片保存到临时目录，按标准分辨率统一压缩后返回 XhsImageInput 列表。"""
-    # 存放所有图片元信息（供后续多模态 Agent 使用）
-    images: List[XhsImageInput] = []
+    """将上传的图片保存到临时目录，按标准分辨率统一压缩后返回 XhsImageInput 列表。
+
+    每张图的保存 + 压缩并发执行（gather 保持入参顺序），
+    避免多图请求在事件循环上串行累加 N 倍解码延迟。
+    """
     # 确保目标临时目录存在（不存在则递归创建）
     base_dir.mkdir(parents=True, exist_ok=True)
 
-    for idx, f in enumerate(files):
-        # 使用递增序号作为 image_id，保证在本次请求中唯一
-        image_id = f"img_{idx}"
-        # 文件名优先使用上传名，缺失时退化为 image_id
-        raw_name = f.filename
-        fallback_name = f"{image_id}.jpg"
-        safe_name = _sanitize_filename(raw_name or "", fallback_name=fallback_name)
-        target_path = base_dir / safe_name
-        
-        # 使用异步方式读取文件内容，确保文件句柄正确关闭
-        content = await f.read()
-        # 直接将二进制内容落盘到临时目录
-        target_path.write_bytes(content)
-
-        # 默认认为压缩前后的路径相同；压缩成功后会被覆盖
-        local_path = target_path
-        try:
-            local_path = compress_image_to_standard(
-                target_path,
-                max_size=max_size,
-                quality=quality,
-            )
-        except Exception as exc:  # noqa: BLE001
-            # 压缩失败只打日志，不中断整个请求，继续使用原图路径
-            logger.warning(
-                "xhs_image_compress_skipped",
-                path=str(target_path),
-                error=str(exc),
-            )
-
-        images.append(
-            XhsImageInput(
-                image_id=image_id,
-                file_name=safe_name,
-                local_path=str(local_path),
+    return list(
+        await asyncio.gather(
+            *(
+                _save_one_image(idx, f, base_dir, max_size, quality, size_threshold)
+                for idx, f in enumerate(files)
             )
         )
+    )
+
+
+def _trash_root() -> Path:
+    """运行目录的回收站：与 xhs_note 同文件系统，rename 才是 O(1)。"""
+    return get_settings().data_output_root / "xhs_note_trash"
+
 
-    return images
+def sweep_trash_directory() -> None:
+    """删除回收站中遗留的运行目录（启动时在后台线程调用一次）。"""
+    try:
+        with os.scandir(_trash_root()) as it:
+            for entry in it:
+                shutil.rmtree(entry.path, ignore_errors=True)
+    except FileNotFoundError:
+        pass
+
+
+# 后台删除任务的强引用，防止未完成的任务被垃圾回收
+_pending_sweeps: set[asyncio.Task] = set()
 
 
-def _cleanup_temp_directory(base_dir: Path) -> None:
+async def _cleanup_temp_directory(base_dir: Path) -> None:
     """清理临时目录及其所有内容。
-    
+
+    请求路径上只做一次 os.rename 把整个运行目录挪进回收站（单个系统调用），
+    逐文件的 lstat + unlink 交给后台线程，不占请求尾延迟；回收站不可用
+    （未预建或跨文件系统）时退回线程池内 rmtree。
+
     Args:
         base_dir: 要清理的目录路径
     """
     try:
         # 仅当目录真实存在且为文件夹时才尝试删除
-        if base_dir.exists() and base_dir.is_dir():
-            shutil.rmtree(base_dir)
+        if not (base_dir.exists() and base_dir.is_dir()):
+            return
+        try:
+            trashed = _trash_root() / base_dir.name
+            os.rename(base_dir, trashed)
+        except OSError:
+            await asyncio.to_thread(shutil.rmtree, base_dir)
             logger.debug("temp_directory_cleaned", base_dir=str(base_dir))
+            return
+        task = asyncio.create_task(
+            asyncio.to_thread(shutil.rmtree, trashed, ignore_errors=True)
+        )
+        _pending_sweeps.add(task)
+        task.add_done_callback(_pending_sweeps.discard)
+        logger.debug("temp_directory_trashed", base_dir=str(base_dir))
     except Exception as exc:  # noqa: BLE001
         # 清理失败不应该影响主流程，只记录警告
         logger.warning(
@@ -154,19 +246,26 @@ async def generate_xhs_note_report(
     if len(files) > settings.xhs_max_images:
         return None, f"最多支持上传 {settings.xhs_max_images} 张图片"
 
-    # 3. 每次调用生成一个简短 run_id，用于区分不同请求和日志追踪
-    run_id = uuid.uuid4().hex[:8]
-    # 4. 构造本次调用专属的临时工作目录：<output_root>/xhs_note/<run_id>
-    base_dir = Path(settings.data_output_dir).resolve() / "xhs_note" / run_id
+    # 3. 每次调用生成一个简短 run_id（8 位十六进制），用于区分不同请求和日志追踪；
+    # 直接取 4 字节系统熵转 hex，省掉构造整个 UUID 对象再截断的弯路
+    run_id = os.urandom(4).hex()
+    # 4. 构造本次调用专属的临时工作目录：<output_root>/xhs_note/<run_id>；
+    # 根目录的 resolve 结果缓存在 Settings 上，不必每个请求重新 realpath
+    base_dir = settings.data_output_root / "xhs_note" / run_id
+
+    # INFO 被关闭时（生产环境调高日志级别）跳过整条日志构造，
+    # 连 idea_text 切片这类仅为日志服务的分配也一并省掉
+    info_on = logging.getLogger(__name__).isEnabledFor(logging.INFO)
 
     # 记录服务入口日志，便于定位线上问题（截断 idea_text 避免日志过长）
-    logger.info(
-        "xhs_note_service_start",
-        idea_text=idea_text[:100],
-        image_count=len(files),
-        run_id=run_id,
-        base_dir=str(base_dir),
-    )
+    if info_on:
+        logger.info(
+            "xhs_note_service_start",
+            idea_text=idea_text[:100],
+            image_count=len(files),
+            run_id=run_id,
+            base_dir=str(base_dir),
+        )
 
     try:
         # 5. 保存并压缩上传图片，统一输出为 XhsImageInput 列表
@@ -175,29 +274,34 @@ async def generate_xhs_note_report(
             base_dir,
             max_size=settings.xhs_image_max_size,
             quality=settings.xhs_image_quality,
+            size_threshold=settings.xhs_image_size_threshold,
         )
-        # 7. 组装领域请求模型，作为 Crew Flow 的输入
-        idea_request = XhsNoteIdeaRequest(
+        # 7. 组装领域请求模型，作为 Crew Flow 的输入；
+        # idea_text 来自 FastAPI Form 校验、images 为上一步构造的内部模型，
+        # 均已定型，model_construct 免去再走一遍校验
+        idea_request = XhsNoteIdeaRequest.model_construct(
             idea_text=idea_text,
             images=images,
         )
 
         # run_xhs_note_flow 现在是异步函数，需要使用 await
-        # 8. 调用多 Agent 编排流程，执行完整的小红书爆款笔记生成链路
-        final_report, error = await run_xhs_note_flow(idea_request)
+        # 8. 调用多 Agent 编排流程，执行完整的小红书爆款笔记生成链路；
+        # 函数内 LOAD_GLOBAL 不走模块 __getattr__，首次调用需显式兜底绑定
+        run_flow = globals().get("run_xhs_note_flow") or __getattr__("run_xhs_note_flow")
+        final_report, error = await run_flow(idea_request)
         
         # 任务完成后才清理临时文件目录
         # 注意：必须在CrewAI流程完全结束后清理，因为多模态Agent需要读取图片文件
-        _cleanup_temp_directory(base_dir)
+        await _cleanup_temp_directory(base_dir)
         
         if error:
             logger.warning("xhs_note_service_failed", error=error, run_id=run_id)
-        else:
+        elif info_on:
             logger.info("xhs_note_service_success", run_id=run_id)
         return final_report, error
     except Exception as exc:  # noqa: BLE001
         # 发生异常时也要清理临时文件，避免临时目录不断堆积
-        _cleanup_temp_directory(base_dir)
+        await _cleanup_temp_directory(base_dir)
         logger.exception("xhs_note_service_exception", error=str(exc), run_id=run_id)
         return None, f"服务异常: {str(exc)}"
 
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import io
 import os
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, AsyncMock, patch
 
 import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
 
+from app.main import app
 from app.schemas.xhs_note import (
     XhsContentStrategyBrief,
     XhsCopywritingOutput,
@@ -22,20 +28,72 @@ from app.schemas.xhs_note import (
 )
 
 
+# ---------------------------------------------------------------------------
+# 共享 HTTP 客户端
+# ---------------------------------------------------------------------------
+
+# 未设置 LIVE_URL 时用 ASGITransport 进程内调用；设置后对真实服务发 HTTP
+LIVE_URL = os.environ.get("LIVE_URL", "").strip()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def async_client():
+    """整个测试会话共享的 AsyncClient。
+
+    每个测试各自 async with AsyncClient(...) 会反复构建 ASGITransport 与
+    连接池；session 级别建一次全部复用，mock/patch 仍按测试粒度生效。
+    """
+    if LIVE_URL:
+        async with AsyncClient(base_url=LIVE_URL) as client:
+            yield client
+    else:
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            yield client
+
+
+# ---------------------------------------------------------------------------
+# 上传测试载荷
+# ---------------------------------------------------------------------------
+
+# 带 JPEG 魔数的伪图片字节，各 HTTP 测试共享，免去读盘
+FAKE_JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100
+
+# 各测试共用的 API Key 请求头（只读，不要原地修改）
+AUTH_HEADERS = {"X-API-Key": "test-key"}
+
+
+def make_upload_files(n: int = 1) -> list:
+    """构造 multipart files 参数；BytesIO 每次新建，无需关闭清理。"""
+    return [
+        ("images", (f"test_{i}.jpg", io.BytesIO(FAKE_JPEG), "image/jpeg"))
+        for i in range(n)
+    ]
+
+
 # ---------------------------------------------------------------------------
 # 测试数据工厂
+#
+# 工厂数据全部是服务端写死的可信常量，统一走 model_construct 跳过
+# pydantic-core 的递归校验（字段校验由 test_schemas 的显式用例覆盖）；
+# 叶子工厂按参数 lru_cache 共享只读实例，聚合模型持有可变 list，
+# 每次基于缓存的子模型现组装，保持测试间隔离。
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=None)
 def make_image_input(idx: int = 0) -> XhsImageInput:
-    return XhsImageInput(
+    return XhsImageInput.model_construct(
         image_id=f"img_{idx}",
         file_name=f"test_{idx}.jpg",
         local_path=f"/tmp/test_{idx}.jpg",
     )
 
 
+@lru_cache(maxsize=None)
 def make_visual_analysis(idx: int = 0) -> XhsImageVisualAnalysis:
-    return XhsImageVisualAnalysis(
+    return XhsImageVisualAnalysis.model_construct(
         image_id=f"img_{idx}",
         file_name=f"test_{idx}.jpg",
         subject_description="一盘色彩丰富的地中海沙拉",
@@ -46,8 +104,9 @@ def make_visual_analysis(idx: int = 0) -> XhsImageVisualAnalysis:
     )
 
 
+@lru_cache(maxsize=None)
 def make_edit_plan(idx: int = 0) -> XhsImageEditPlan:
-    return XhsImageEditPlan(
+    return XhsImageEditPlan.model_construct(
         image_id=f"img_{idx}",
         file_name=f"test_{idx}.jpg",
         overall_edit_strategy="提升整体明亮度，突出食物色彩",
@@ -62,14 +121,15 @@ def make_edit_plan(idx: int = 0) -> XhsImageEditPlan:
 
 
 def make_idea_request(image_count: int = 2) -> XhsNoteIdeaRequest:
-    return XhsNoteIdeaRequest(
+    return XhsNoteIdeaRequest.model_construct(
         idea_text="我想分享最近开始用地中海饮食减脂",
         images=[make_image_input(i) for i in range(image_count)],
     )
 
 
+@lru_cache(maxsize=None)
 def make_strategy_brief() -> XhsContentStrategyBrief:
-    return XhsContentStrategyBrief(
+    return XhsContentStrategyBrief.model_construct(
         input_evaluation="用户有清晰的减脂主题，图片素材丰富",
         target_audience_persona="25-35岁都市白领女性",
         core_pain_point="减脂难以坚持，饮食选择困难",
@@ -81,8 +141,9 @@ def make_strategy_brief() -> XhsContentStrategyBrief:
     )
 
 
+@lru_cache(maxsize=None)
 def make_copywriting() -> XhsCopywritingOutput:
-    return XhsCopywritingOutput(
+    return XhsCopywritingOutput.model_construct(
         title="🥗 地中海饮食一周瘦3斤！",
         content="最近开始尝试地中海饮食...",
         picture_order=["img_0", "img_1"],
@@ -90,8 +151,9 @@ def make_copywriting() -> XhsCopywritingOutput:
     )
 
 
+@lru_cache(maxsize=None)
 def make_seo_note() -> XhsSEOOptimizedNote:
-    return XhsSEOOptimizedNote(
+    return XhsSEOOptimizedNote.model_construct(
         optimization_summary="优化了标题和标签的关键词覆盖",
         optimized_title="🥗 地中海饮食减脂｜一周瘦3斤的懒人食谱",
         optimized_content="最近开始尝试地中海饮食减脂...",
@@ -101,7 +163,7 @@ def make_seo_note() -> XhsSEOOptimizedNote:
 
 
 def make_visual_batch(image_count: int = 2) -> XhsVisualBatchReport:
-    return XhsVisualBatchReport(
+    return XhsVisualBatchReport.model_construct(
         user_raw_intent="我想分享最近开始用地中海饮食减脂",
         images_visual=[make_visual_analysis(i) for i in range(image_count)],
         summary="整体图片色彩丰富，适合美食类笔记",
@@ -109,7 +171,7 @@ def make_visual_batch(image_count: int = 2) -> XhsVisualBatchReport:
 
 
 def make_edit_batch(image_count: int = 2) -> XhsImageEditBatchReport:
-    return XhsImageEditBatchReport(
+    return XhsImageEditBatchReport.model_construct(
         images_edit_plan=[make_edit_plan(i) for i in range(image_count)],
         summary="统一提升明亮度和饱和度，保持清新风格",
     )
@@ -119,17 +181,31 @@ def make_edit_batch(image_count: int = 2) -> XhsImageEditBatchReport:
 # Mock CrewAI 结果
 # ---------------------------------------------------------------------------
 
+@dataclass(slots=True, frozen=True)
 class MockTaskOutput:
-    """模拟 CrewAI TaskOutput 对象。"""
-    def __init__(self, pydantic: Any = None, raw: str = ""):
-        self.pydantic = pydantic
-        self.raw = raw
+    """模拟 CrewAI TaskOutput 对象（slots：无 __dict__，属性走槽位描述符）。"""
+    pydantic: Any = None
+    raw: str = ""
 
 
+@dataclass(slots=True, frozen=True)
 class MockCrewResult:
     """模拟 CrewAI akickoff 返回的结果。"""
-    def __init__(self, tasks_output: list | None = None):
-        self.tasks_output = tasks_output or []
+    tasks_output: list = field(default_factory=list)
+
+
+@pytest.fixture
+def make_crew_mock():
+    """构造 Crew 实例 mock 的工厂。
+
+    spec= 限定属性面，MagicMock 不再为全部魔术方法生成 ~40 个子 mock，
+    每个实例只带一个 akickoff。
+    """
+    def _make(tasks_output: list) -> MagicMock:
+        inst = MagicMock(spec=["akickoff"])
+        inst.akickoff = AsyncMock(return_value=MockCrewResult(tasks_output))
+        return inst
+    return _make
 
 
 # ---------------------------------------------------------------------------
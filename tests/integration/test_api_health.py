@@ -12,38 +12,21 @@
   或  PYTHONPATH=src python tests/integration/test_api_health.py
 """
 
-import os
 import pytest
-from httpx import ASGITransport, AsyncClient
-
-from app.main import app
 
+# 客户端统一来自 conftest 的 session 级 async_client fixture：
 # 未设置 LIVE_URL 时用 ASGITransport 进程内调用；设置后对真实服务发 HTTP
-LIVE_URL = os.environ.get("LIVE_URL", "").strip()
-
-
-def _make_client():
-    if LIVE_URL:
-        return AsyncClient(base_url=LIVE_URL)
-    return AsyncClient(
-        transport=ASGITransport(app=app),
-        base_url="http://localhost:8000",
-    )
 
 
-@pytest.mark.asyncio
-async def test_health_live() -> None:
-    async with _make_client() as client:
-        r = await client.get("/health/live")
+async def test_health_live(async_client) -> None:
+    r = await async_client.get("/health/live")
     print(r.json())
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
 
 
-@pytest.mark.asyncio
-async def test_health_ready() -> None:
-    async with _make_client() as client:
-        r = await client.get("/health/ready")
+async def test_health_ready(async_client) -> None:
+    r = await async_client.get("/health/ready")
     print(r.json())
     assert r.status_code == 200
     data = r.json()
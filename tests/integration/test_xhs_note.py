@@ -10,49 +10,35 @@ from pathlib import Path
 from unittest.mock import patch
 
 import pytest
-from httpx import ASGITransport, AsyncClient
 
-from app.main import app
+from tests.conftest import AUTH_HEADERS, make_upload_files
+
+
+def _upload_files(n: int = 2) -> list:
+    """默认用内存伪 JPEG；设置 XHS_USE_REAL_IMAGES=1 时读取目录下的真实图片。"""
+    if os.environ.get("XHS_USE_REAL_IMAGES", "").strip() != "1":
+        return make_upload_files(n)
+    tests_dir = Path(__file__).resolve().parent
+    image_files = sorted(tests_dir.glob("*.jpg"))[:n]
+    return [
+        ("images", (p.name, p.read_bytes(), "image/jpeg")) for p in image_files
+    ] or make_upload_files(n)
 
 
-@pytest.mark.asyncio
 @patch("app.api.v1.xhs_note.generate_xhs_note_report")
-async def test_xhs_note_report_success(mock_generate) -> None:
+async def test_xhs_note_report_success(mock_generate, async_client) -> None:
     """成功路径：返回 code=0 + report 字符串。"""
     mock_generate.return_value = (
         "原始创作意图: 地中海饮食\n生成笔记标题: 测试标题\n生成笔记正文: 测试正文",
         "",
     )
 
-    tests_dir = Path(__file__).resolve().parent
-    image_files = sorted(tests_dir.glob("*.jpg"))
-
-    if not image_files:
-        # 没有测试图片时创建一个临时文件
-        import tempfile
-        tmp = tempfile.NamedTemporaryFile(suffix=".jpg", dir=str(tests_dir), delete=False)
-        tmp.write(b"\xff\xd8\xff\xe0" + b"\x00" * 100)
-        tmp.close()
-        image_files = [Path(tmp.name)]
-
-    files = [
-        ("images", (p.name, open(str(p), "rb"), "image/jpeg")) for p in image_files[:2]
-    ]
-
-    try:
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://localhost:8000",
-        ) as client:
-            resp = await client.post(
-                "/api/v1/xhs/notes/report",
-                data={"idea_text": "我想分享最近开始用地中海饮食减脂"},
-                files=files,
-                headers={"X-API-Key": "test-key"},
-            )
-    finally:
-        for _, (_, fobj, _) in files:
-            fobj.close()
+    resp = await async_client.post(
+        "/api/v1/xhs/notes/report",
+        data={"idea_text": "我想分享最近开始用地中海饮食减脂"},
+        files=_upload_files(2),
+        headers=AUTH_HEADERS,
+    )
 
     assert resp.status_code == 200, resp.text
     body = resp.json()
@@ -70,21 +56,16 @@ async def test_xhs_note_report_success(mock_generate) -> None:
     assert len(data["report"]) > 0
 
 
-@pytest.mark.asyncio
 @patch("app.api.v1.xhs_note.generate_xhs_note_report")
-async def test_xhs_note_report_failure(mock_generate) -> None:
+async def test_xhs_note_report_failure(mock_generate, async_client) -> None:
     """失败路径：LLM 返回错误时 code=1。"""
     mock_generate.return_value = (None, "LLM 调用超时")
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app),
-        base_url="http://localhost:8000",
-    ) as client:
-        resp = await client.post(
-            "/api/v1/xhs/notes/report",
-            data={"idea_text": "测试"},
-            files=[("images", ("test.jpg", b"\xff\xd8\xff\xe0", "image/jpeg"))],
-        )
+    resp = await async_client.post(
+        "/api/v1/xhs/notes/report",
+        data={"idea_text": "测试"},
+        files=make_upload_files(),
+    )
 
     assert resp.status_code == 200
     body = resp.json()
@@ -92,17 +73,12 @@ async def test_xhs_note_report_failure(mock_generate) -> None:
     assert "失败" in body["message"]
 
 
-@pytest.mark.asyncio
-async def test_xhs_note_report_missing_images() -> None:
+async def test_xhs_note_report_missing_images(async_client) -> None:
     """缺少图片字段应返回 422。"""
-    async with AsyncClient(
-        transport=ASGITransport(app=app),
-        base_url="http://localhost:8000",
-    ) as client:
-        resp = await client.post(
-            "/api/v1/xhs/notes/report",
-            data={"idea_text": "测试"},
-        )
+    resp = await async_client.post(
+        "/api/v1/xhs/notes/report",
+        data={"idea_text": "测试"},
+    )
     assert resp.status_code == 422
 
 
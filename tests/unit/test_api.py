@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
-from httpx import ASGITransport, AsyncClient
 
-from app.main import create_application, app
+from app.main import create_application
 from app.api.dependencies import get_request_id
+from tests.conftest import make_upload_files
 
 
 # ---------------------------------------------------------------------------
@@ -16,33 +17,32 @@ from app.api.dependencies import get_request_id
 # ---------------------------------------------------------------------------
 
 
+@lru_cache(maxsize=4)
+def _app_for_env(env: str):
+    """按 env 构建并缓存应用实例：完整的 FastAPI 初始化（路由注册、
+    中间件栈、schema 构建）每个 env 只跑一次。"""
+    with patch("app.main.get_settings") as mock:
+        s = MagicMock()
+        s.env = env
+        s.log_level = "INFO"
+        s.log_dir = "./logs"
+        s.port = 8072
+        mock.return_value = s
+        return create_application()
+
+
 class TestCreateApplication:
     def test_creates_fastapi_app(self):
-        application = create_application()
+        application = _app_for_env("development")
         assert application is not None
         assert application.title == "Enterprise AI App"
 
-    def test_docs_available_in_dev(self):
-        with patch("app.main.get_settings") as mock:
-            s = MagicMock()
-            s.env = "development"
-            s.log_level = "INFO"
-            s.log_dir = "./logs"
-            s.port = 8072
-            mock.return_value = s
-            application = create_application()
-            assert application.docs_url == "/docs"
-
-    def test_docs_hidden_in_production(self):
-        with patch("app.main.get_settings") as mock:
-            s = MagicMock()
-            s.env = "production"
-            s.log_level = "INFO"
-            s.log_dir = "./logs"
-            s.port = 8072
-            mock.return_value = s
-            application = create_application()
-            assert application.docs_url is None
+    @pytest.mark.parametrize(
+        "env,expected",
+        [("development", "/docs"), ("production", None)],
+    )
+    def test_docs_url_by_env(self, env, expected):
+        assert _app_for_env(env).docs_url == expected
 
 
 # ---------------------------------------------------------------------------
@@ -51,14 +51,12 @@ class TestCreateApplication:
 
 
 class TestGetRequestId:
-    @pytest.mark.asyncio
     async def test_from_header(self):
         request = MagicMock()
         request.headers = {"X-Request-ID": "test-rid-999"}
         rid = await get_request_id(request)
         assert rid == "test-rid-999"
 
-    @pytest.mark.asyncio
     async def test_auto_generate(self):
         request = MagicMock()
         request.headers = {}
@@ -72,35 +70,20 @@ class TestGetRequestId:
 
 
 class TestHealthEndpoints:
-    @pytest.mark.asyncio
-    async def test_liveness(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/health/live")
+    async def test_liveness(self, async_client):
+        r = await async_client.get("/health/live")
         assert r.status_code == 200
         assert r.json() == {"status": "ok"}
 
-    @pytest.mark.asyncio
-    async def test_readiness(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/health/ready")
+    async def test_readiness(self, async_client):
+        r = await async_client.get("/health/ready")
         assert r.status_code == 200
         data = r.json()
         assert data["code"] == 0
         assert "request_id" in data
 
-    @pytest.mark.asyncio
-    async def test_metrics_endpoint(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/metrics")
+    async def test_metrics_endpoint(self, async_client):
+        r = await async_client.get("/metrics")
         assert r.status_code == 200
         assert "http_request" in r.text or "process" in r.text
 
@@ -111,68 +94,48 @@ class TestHealthEndpoints:
 
 
 class TestXhsNoteApi:
-    @pytest.mark.asyncio
     @patch("app.api.v1.xhs_note.generate_xhs_note_report")
-    async def test_success(self, mock_generate):
+    async def test_success(self, mock_generate, async_client):
         mock_generate.return_value = ("最终报告内容", "")
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.post(
-                "/api/v1/xhs/notes/report",
-                data={"idea_text": "测试意图"},
-                files=[("images", ("test.jpg", b"\xff\xd8\xff\xe0", "image/jpeg"))],
-            )
+        r = await async_client.post(
+            "/api/v1/xhs/notes/report",
+            data={"idea_text": "测试意图"},
+            files=make_upload_files(),
+        )
         assert r.status_code == 200
         body = r.json()
         assert body["code"] == 0
         assert body["data"]["report"] == "最终报告内容"
 
-    @pytest.mark.asyncio
     @patch("app.api.v1.xhs_note.generate_xhs_note_report")
-    async def test_generation_failure(self, mock_generate):
+    async def test_generation_failure(self, mock_generate, async_client):
         mock_generate.return_value = (None, "LLM 调用失败")
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.post(
-                "/api/v1/xhs/notes/report",
-                data={"idea_text": "测试"},
-                files=[("images", ("test.jpg", b"\xff\xd8\xff\xe0", "image/jpeg"))],
-            )
+        r = await async_client.post(
+            "/api/v1/xhs/notes/report",
+            data={"idea_text": "测试"},
+            files=make_upload_files(),
+        )
         assert r.status_code == 200
         body = r.json()
         assert body["code"] == 1
         assert "失败" in body["message"]
 
-    @pytest.mark.asyncio
     @patch("app.api.v1.xhs_note.generate_xhs_note_report")
-    async def test_exception_handling(self, mock_generate):
+    async def test_exception_handling(self, mock_generate, async_client):
         mock_generate.side_effect = RuntimeError("意外错误")
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.post(
-                "/api/v1/xhs/notes/report",
-                data={"idea_text": "测试"},
-                files=[("images", ("test.jpg", b"\xff\xd8\xff\xe0", "image/jpeg"))],
-            )
+        r = await async_client.post(
+            "/api/v1/xhs/notes/report",
+            data={"idea_text": "测试"},
+            files=make_upload_files(),
+        )
         assert r.status_code == 500
 
-    @pytest.mark.asyncio
-    async def test_missing_idea_text(self):
+    async def test_missing_idea_text(self, async_client):
         """缺少 idea_text 应返回 422。"""
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.post(
-                "/api/v1/xhs/notes/report",
-                files=[("images", ("test.jpg", b"\xff\xd8\xff\xe0", "image/jpeg"))],
-            )
+        r = await async_client.post(
+            "/api/v1/xhs/notes/report",
+            files=make_upload_files(),
+        )
         assert r.status_code == 422
 
 
@@ -182,29 +145,14 @@ class TestXhsNoteApi:
 
 
 class TestExceptionHandlers:
-    @pytest.mark.asyncio
-    async def test_404(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/nonexistent/path")
+    async def test_404(self, async_client):
+        r = await async_client.get("/nonexistent/path")
         assert r.status_code == 404
 
-    @pytest.mark.asyncio
-    async def test_request_id_header_in_response(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/health/live", headers={"X-Request-ID": "my-rid"})
+    async def test_request_id_header_in_response(self, async_client):
+        r = await async_client.get("/health/live", headers={"X-Request-ID": "my-rid"})
         assert "X-Request-ID" in r.headers
 
-    @pytest.mark.asyncio
-    async def test_traceparent_in_response(self):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as client:
-            r = await client.get("/health/live")
+    async def test_traceparent_in_response(self, async_client):
+        r = await async_client.get("/health/live")
         assert "traceparent" in r.headers
@@ -8,137 +8,131 @@ from pydantic import ValidationError
 from app.core.config import Settings, get_settings
 
 
-class TestSettingsDefaults:
-    def test_defaults(self, monkeypatch):
-        # 清理可能覆盖默认值的环境变量
-        for key in list(os.environ):
-            if key.startswith("APP_"):
-                monkeypatch.delenv(key, raising=False)
-        monkeypatch.delenv("QWEN_API_KEY", raising=False)
-        monkeypatch.delenv("BAIDU_API_KEY", raising=False)
-        s = Settings(llm_api_key="k", _env_file=None)
-        assert s.env == "development"
-        assert s.port == 8072
-        assert s.log_level == "INFO"
-
-    def test_database_url_default(self, monkeypatch):
-        for key in list(os.environ):
-            if key.startswith("APP_"):
-                monkeypatch.delenv(key, raising=False)
-        monkeypatch.delenv("QWEN_API_KEY", raising=False)
-        monkeypatch.delenv("BAIDU_API_KEY", raising=False)
-        s = Settings(llm_api_key="k", _env_file=None)
-        assert "sqlite" in s.database_url
-
-    def test_xhs_defaults(self):
-        s = Settings(llm_api_key="k")
-        assert s.xhs_image_max_size == 1024
-        assert s.xhs_image_quality == 85
-        assert s.xhs_max_images == 20
-        assert s.crew_execution_timeout == 600
-
-
-class TestApiKeys:
-    def test_empty(self):
-        s = Settings(api_keys="", llm_api_key="k")
-        assert s.get_valid_api_keys() == set()
-
-    def test_single(self):
-        s = Settings(api_keys="key1", llm_api_key="k")
-        assert s.get_valid_api_keys() == {"key1"}
+@pytest.fixture(scope="module")
+def clean_env():
+    """模块级清空 APP_*/备用 Key 环境变量，整个文件只做一次快照与恢复。"""
+    saved = os.environ.copy()
+    for key in list(os.environ):
+        if key.startswith("APP_"):
+            del os.environ[key]
+    os.environ.pop("QWEN_API_KEY", None)
+    os.environ.pop("BAIDU_API_KEY", None)
+    yield
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+@pytest.fixture(scope="module")
+def base_settings(clean_env):
+    """模块级共享的基线配置：跳过 .env 与环境变量，完整构造只发生一次；
+    各测试用 model_copy(update=...) 派生变体，不再逐个重跑 env 源解析。"""
+    return Settings(llm_api_key="k", _env_file=None)
 
-    def test_multiple(self):
-        s = Settings(api_keys=" key1 , key2 ", llm_api_key="k")
-        assert s.get_valid_api_keys() == {"key1", "key2"}
-
-    def test_whitespace_only(self):
-        s = Settings(api_keys="   ", llm_api_key="k")
-        assert s.get_valid_api_keys() == set()
-
-
-class TestValidators:
-    def test_log_level_valid(self):
-        for level in ("DEBUG", "INFO", "WARNING", "ERROR", "debug", "info"):
-            s = Settings(log_level=level, llm_api_key="k")
-            assert s.log_level == level.upper()
 
-    def test_log_level_invalid(self):
-        with pytest.raises(ValidationError):
-            Settings(log_level="TRACE", llm_api_key="k")
+class TestSettingsDefaults:
+    def test_defaults(self, base_settings):
+        assert base_settings.env == "development"
+        assert base_settings.port == 8072
+        assert base_settings.log_level == "INFO"
 
-    def test_xhs_image_quality_valid(self):
-        s = Settings(xhs_image_quality=1, llm_api_key="k")
-        assert s.xhs_image_quality == 1
-        s = Settings(xhs_image_quality=100, llm_api_key="k")
-        assert s.xhs_image_quality == 100
+    def test_database_url_default(self, base_settings):
+        assert "sqlite" in base_settings.database_url
 
-    def test_xhs_image_quality_invalid_low(self):
-        with pytest.raises(ValidationError):
-            Settings(xhs_image_quality=0, llm_api_key="k")
+    def test_xhs_defaults(self, base_settings):
+        assert base_settings.xhs_image_max_size == 1024
+        assert base_settings.xhs_image_quality == 85
+        assert base_settings.xhs_max_images == 20
+        assert base_settings.crew_execution_timeout == 600
 
-    def test_xhs_image_quality_invalid_high(self):
-        with pytest.raises(ValidationError):
-            Settings(xhs_image_quality=101, llm_api_key="k")
 
-    def test_llm_retry_count_valid(self):
-        s = Settings(llm_retry_count=0, llm_api_key="k")
-        assert s.llm_retry_count == 0
-        s = Settings(llm_retry_count=10, llm_api_key="k")
-        assert s.llm_retry_count == 10
+class TestApiKeys:
+    @pytest.mark.parametrize(
+        "api_keys,expected",
+        [
+            ("", set()),
+            ("key1", {"key1"}),
+            (" key1 , key2 ", {"key1", "key2"}),
+            ("   ", set()),
+        ],
+    )
+    def test_parse(self, base_settings, api_keys, expected):
+        s = base_settings.model_copy(update={"api_keys": api_keys})
+        assert s.get_valid_api_keys() == expected
 
-    def test_llm_retry_count_negative(self):
-        with pytest.raises(ValidationError):
-            Settings(llm_retry_count=-1, llm_api_key="k")
 
-    def test_llm_retry_count_too_high(self):
+class TestValidators:
+    # 合法/非法各收敛为一张参数表；注意 model_copy 不走校验器，
+    # 这里必须真实构造 Settings 才能覆盖校验逻辑
+    @pytest.mark.parametrize(
+        "field,value,expected",
+        [
+            ("log_level", "DEBUG", "DEBUG"),
+            ("log_level", "INFO", "INFO"),
+            ("log_level", "WARNING", "WARNING"),
+            ("log_level", "ERROR", "ERROR"),
+            ("log_level", "debug", "DEBUG"),
+            ("log_level", "info", "INFO"),
+            ("xhs_image_quality", 1, 1),
+            ("xhs_image_quality", 100, 100),
+            ("llm_retry_count", 0, 0),
+            ("llm_retry_count", 10, 10),
+        ],
+    )
+    def test_valid(self, field, value, expected):
+        s = Settings(llm_api_key="k", **{field: value})
+        assert getattr(s, field) == expected
+
+    @pytest.mark.parametrize(
+        "field,value",
+        [
+            ("log_level", "TRACE"),
+            ("xhs_image_quality", 0),
+            ("xhs_image_quality", 101),
+            ("llm_retry_count", -1),
+            ("llm_retry_count", 11),
+        ],
+    )
+    def test_invalid(self, field, value):
         with pytest.raises(ValidationError):
-            Settings(llm_retry_count=11, llm_api_key="k")
+            Settings(llm_api_key="k", **{field: value})
 
 
 class TestIsProduction:
-    def test_production(self):
-        s = Settings(env="production", llm_api_key="k")
-        assert s.is_production is True
-
-    def test_development(self):
-        s = Settings(env="development", llm_api_key="k")
-        assert s.is_production is False
-
-    def test_staging(self):
-        s = Settings(env="staging", llm_api_key="k")
-        assert s.is_production is False
+    @pytest.mark.parametrize(
+        "env,expected",
+        [("production", True), ("development", False), ("staging", False)],
+    )
+    def test_is_production(self, base_settings, env, expected):
+        s = base_settings.model_copy(update={"env": env})
+        assert s.is_production is expected
 
 
 class TestFallbackApiKeys:
-    def test_fallback_qwen(self):
-        env = os.environ.copy()
-        os.environ["QWEN_API_KEY"] = "qwen-fallback"
-        try:
-            s = Settings(llm_api_key="")
-            assert s.llm_api_key == "qwen-fallback"
-        finally:
-            os.environ.clear()
-            os.environ.update(env)
-
-    def test_fallback_baidu(self):
-        env = os.environ.copy()
-        os.environ["BAIDU_API_KEY"] = "baidu-fallback"
-        try:
-            s = Settings(llm_api_key="k", baidu_api_key="")
-            assert s.baidu_api_key == "baidu-fallback"
-        finally:
-            os.environ.clear()
-            os.environ.update(env)
-
-    def test_explicit_takes_priority(self):
-        env = os.environ.copy()
-        os.environ["QWEN_API_KEY"] = "qwen-fallback"
-        try:
-            s = Settings(llm_api_key="explicit-key")
-            assert s.llm_api_key == "explicit-key"
-        finally:
-            os.environ.clear()
-            os.environ.update(env)
+    @pytest.mark.parametrize(
+        "kwargs,env_key,field,expected",
+        [
+            # 未显式配置时退回 QWEN_API_KEY / BAIDU_API_KEY
+            ({"llm_api_key": ""}, "QWEN_API_KEY", "llm_api_key", "env-fallback"),
+            (
+                {"llm_api_key": "k", "baidu_api_key": ""},
+                "BAIDU_API_KEY",
+                "baidu_api_key",
+                "env-fallback",
+            ),
+            # 显式配置优先于环境变量
+            (
+                {"llm_api_key": "explicit-key"},
+                "QWEN_API_KEY",
+                "llm_api_key",
+                "explicit-key",
+            ),
+        ],
+    )
+    def test_fallback(self, monkeypatch, kwargs, env_key, field, expected):
+        # monkeypatch 只快照被改动的键，免去整份 os.environ 的复制与恢复
+        monkeypatch.setenv(env_key, "env-fallback")
+        s = Settings(_env_file=None, **kwargs)
+        assert getattr(s, field) == expected
 
 
 class TestGetSettings:
@@ -2,10 +2,30 @@
 
 from __future__ import annotations
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 import pytest
 
+from app.crews.xhs_note.agents import (
+    _agent_cfg,
+    _load_agents_config,
+    get_xhs_content_writer,
+    get_xhs_growth_strategist,
+    get_xhs_image_editor,
+    get_xhs_seo_expert,
+    get_xhs_visual_analyst,
+)
+from app.crews.xhs_note.tasks import (
+    _get_task_config,
+    _load_tasks_config,
+    build_image_edit_plan_summary_task,
+    build_image_edit_task,
+    build_visual_analysis_summary_task,
+    build_visual_analysis_task,
+    get_task_content_strategy,
+    get_task_copywriting,
+    get_task_seo_optimization,
+)
 from app.schemas.xhs_note import (
     XhsContentStrategyBrief,
     XhsCopywritingOutput,
@@ -13,12 +33,33 @@ from app.schemas.xhs_note import (
     XhsImageVisualAnalysis,
     XhsSEOOptimizedNote,
 )
+from tests.conftest import make_image_input, make_visual_analysis
 
 
 # ---------------------------------------------------------------------------
 # Agent 工厂方法测试
 # ---------------------------------------------------------------------------
 
+# 逐测试叠两层 @patch 会反复改写模块属性并新建 MagicMock；
+# 模块级 MonkeyPatch 只替换一次，函数级 fixture 负责在用例间 reset
+
+
+@pytest.fixture(scope="module")
+def _agents_patched():
+    mp = pytest.MonkeyPatch()
+    mock_cls = MagicMock()
+    mp.setattr("app.crews.xhs_note.agents.Agent", mock_cls)
+    mp.setattr("app.crews.xhs_note.agents.get_llm", MagicMock())
+    yield mock_cls
+    mp.undo()
+
+
+@pytest.fixture
+def agent_cls(_agents_patched):
+    """拿到已重置的 Agent mock 构造器（模块内只 patch 一次）。"""
+    _agents_patched.reset_mock(return_value=True, side_effect=True)
+    return _agents_patched
+
 
 class TestAgentFactories:
     """测试每个 get_xhs_* Agent 工厂方法。
@@ -27,74 +68,45 @@ class TestAgentFactories:
     因此需要同时 mock Agent 构造函数本身。
     """
 
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_get_xhs_visual_analyst(self, mock_get_llm, mock_agent_cls):
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.return_value = MagicMock(multimodal=True)
-        from app.crews.xhs_note.agents import get_xhs_visual_analyst
+    def test_get_xhs_visual_analyst(self, agent_cls):
         agent = get_xhs_visual_analyst()
         assert agent is not None
-        mock_agent_cls.assert_called_once()
-        call_kwargs = mock_agent_cls.call_args[1]
+        agent_cls.assert_called_once()
+        call_kwargs = agent_cls.call_args[1]
         assert call_kwargs["multimodal"] is True
 
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_get_xhs_image_editor(self, mock_get_llm, mock_agent_cls):
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.return_value = MagicMock(multimodal=True)
-        from app.crews.xhs_note.agents import get_xhs_image_editor
+    def test_get_xhs_image_editor(self, agent_cls):
         agent = get_xhs_image_editor()
         assert agent is not None
-        call_kwargs = mock_agent_cls.call_args[1]
+        call_kwargs = agent_cls.call_args[1]
         assert call_kwargs["multimodal"] is True
 
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_get_xhs_growth_strategist(self, mock_get_llm, mock_agent_cls):
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.return_value = MagicMock()
-        from app.crews.xhs_note.agents import get_xhs_growth_strategist
+    def test_get_xhs_growth_strategist(self, agent_cls):
         agent = get_xhs_growth_strategist()
         assert agent is not None
-        mock_agent_cls.assert_called_once()
-
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_get_xhs_content_writer(self, mock_get_llm, mock_agent_cls):
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.return_value = MagicMock()
-        from app.crews.xhs_note.agents import get_xhs_content_writer
+        agent_cls.assert_called_once()
+
+    def test_get_xhs_content_writer(self, agent_cls):
         agent = get_xhs_content_writer()
         assert agent is not None
 
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_get_xhs_seo_expert(self, mock_get_llm, mock_agent_cls):
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.return_value = MagicMock()
-        from app.crews.xhs_note.agents import get_xhs_seo_expert
+    def test_get_xhs_seo_expert(self, agent_cls):
         agent = get_xhs_seo_expert()
         assert agent is not None
 
-    @patch("app.crews.xhs_note.agents.Agent")
-    @patch("app.crews.xhs_note.agents.get_llm")
-    def test_agents_are_new_instances(self, mock_get_llm, mock_agent_cls):
-        """每次调用应返回新实例，不应为单例。"""
-        mock_get_llm.return_value = MagicMock()
-        mock_agent_cls.side_effect = [MagicMock(), MagicMock()]
-        from app.crews.xhs_note.agents import get_xhs_visual_analyst
+    def test_agent_instances_are_new(self, agent_cls):
+        """Agent 持有可变执行状态（executor、消息历史），工厂必须每次新建。"""
+        agent_cls.side_effect = [MagicMock(), MagicMock()]
         a1 = get_xhs_visual_analyst()
         a2 = get_xhs_visual_analyst()
         assert a1 is not a2
+        assert agent_cls.call_count == 2
 
 
 class TestAgentConfig:
     """测试 Agent 配置加载。"""
 
     def test_load_agents_config(self):
-        from app.crews.xhs_note.agents import _load_agents_config
         cfg = _load_agents_config()
         assert isinstance(cfg, dict)
         # YAML 中应有 5 个 Agent 配置
@@ -105,14 +117,12 @@ class TestAgentConfig:
         assert "xhs_seo_expert" in cfg
 
     def test_agent_cfg_has_role(self):
-        from app.crews.xhs_note.agents import _agent_cfg
         cfg = _agent_cfg("xhs_visual_analyst")
         assert "role" in cfg
         assert "goal" in cfg
         assert "backstory" in cfg
 
     def test_agent_cfg_nonexistent(self):
-        from app.crews.xhs_note.agents import _agent_cfg
         cfg = _agent_cfg("nonexistent_agent")
         assert cfg == {}
 
@@ -126,7 +136,6 @@ class TestTaskConfig:
     """测试 Task 配置加载。"""
 
     def test_load_tasks_config(self):
-        from app.crews.xhs_note.tasks import _load_tasks_config
         cfg = _load_tasks_config()
         assert isinstance(cfg, dict)
         assert "task_visual_analysis" in cfg
@@ -136,17 +145,44 @@ class TestTaskConfig:
         assert "task_seo_optimization" in cfg
 
     def test_get_task_config(self):
-        from app.crews.xhs_note.tasks import _get_task_config
-        cfg = _get_task_config("task_visual_analysis")
+        cfg = _get_task_config("task_visual_analysis", {})
         assert "description" in cfg
         assert "expected_output" in cfg
 
     def test_get_task_config_nonexistent(self):
-        from app.crews.xhs_note.tasks import _get_task_config
-        cfg = _get_task_config("nonexistent_task")
+        # _get_task_config 现在是 dict.get 的绑定方法，默认值由调用方显式传入
+        cfg = _get_task_config("nonexistent_task", {})
         assert cfg == {}
 
 
+@pytest.fixture(scope="module")
+def _tasks_patched():
+    mp = pytest.MonkeyPatch()
+    mock_cls = MagicMock()
+    mp.setattr("app.crews.xhs_note.tasks.Task", mock_cls)
+    # Agent getter 统一换成返回新 mock 的工厂，整个模块只 patch 一次
+    for getter in (
+        "get_xhs_visual_analyst",
+        "get_xhs_image_editor",
+        "get_xhs_growth_strategist",
+        "get_xhs_content_writer",
+        "get_xhs_seo_expert",
+    ):
+        mp.setattr(
+            f"app.crews.xhs_note.tasks.{getter}",
+            MagicMock(side_effect=lambda: MagicMock()),
+        )
+    yield mock_cls
+    mp.undo()
+
+
+@pytest.fixture
+def task_cls(_tasks_patched):
+    """拿到已重置的 Task mock 构造器（模块内只 patch 一次）。"""
+    _tasks_patched.reset_mock(return_value=True, side_effect=True)
+    return _tasks_patched
+
+
 class TestTaskFactories:
     """测试 Task 工厂函数。
 
@@ -154,98 +190,57 @@ class TestTaskFactories:
     因此需要 mock Task 构造函数本身。
     """
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_visual_analyst")
-    def test_build_visual_analysis_task(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import build_visual_analysis_task
-        from tests.conftest import make_image_input
+    def test_build_visual_analysis_task(self, task_cls):
         task = build_visual_analysis_task(make_image_input(0), "测试意图")
         assert task is not None
-        mock_task_cls.assert_called_once()
-        call_kwargs = mock_task_cls.call_args[1]
+        task_cls.assert_called_once()
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["output_pydantic"] == XhsImageVisualAnalysis
         assert call_kwargs["async_execution"] is True
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_visual_analyst")
-    def test_build_visual_analysis_summary_task(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import build_visual_analysis_summary_task
+    def test_build_visual_analysis_summary_task(self, task_cls):
         mock_tasks = [MagicMock(), MagicMock()]
         task = build_visual_analysis_summary_task(mock_tasks)
         assert task is not None
-        call_kwargs = mock_task_cls.call_args[1]
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["async_execution"] is False
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_image_editor")
-    def test_build_image_edit_task(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import build_image_edit_task
-        from tests.conftest import make_image_input, make_visual_analysis
+    def test_build_image_edit_task(self, task_cls):
         task = build_image_edit_task("测试意图", make_image_input(0), make_visual_analysis(0))
         assert task is not None
-        call_kwargs = mock_task_cls.call_args[1]
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["output_pydantic"] == XhsImageEditPlan
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_image_editor")
-    def test_build_image_edit_plan_summary_task(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import build_image_edit_plan_summary_task
+    def test_build_image_edit_plan_summary_task(self, task_cls):
         task = build_image_edit_plan_summary_task([MagicMock()])
         assert task is not None
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_growth_strategist")
-    def test_get_task_content_strategy(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import get_task_content_strategy
+    def test_get_task_content_strategy(self, task_cls):
         task = get_task_content_strategy()
         assert task is not None
-        call_kwargs = mock_task_cls.call_args[1]
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["output_pydantic"] == XhsContentStrategyBrief
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_content_writer")
-    def test_get_task_copywriting(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import get_task_copywriting
+    def test_get_task_copywriting(self, task_cls):
         mock_strategy_task = MagicMock()
         task = get_task_copywriting(mock_strategy_task)
         assert task is not None
-        call_kwargs = mock_task_cls.call_args[1]
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["output_pydantic"] == XhsCopywritingOutput
         assert mock_strategy_task in call_kwargs["context"]
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_seo_expert")
-    def test_get_task_seo_optimization(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.return_value = MagicMock()
-        from app.crews.xhs_note.tasks import get_task_seo_optimization
+    def test_get_task_seo_optimization(self, task_cls):
         mock_strategy = MagicMock()
         mock_copywriting = MagicMock()
         task = get_task_seo_optimization(mock_strategy, mock_copywriting)
         assert task is not None
-        call_kwargs = mock_task_cls.call_args[1]
+        call_kwargs = task_cls.call_args[1]
         assert call_kwargs["output_pydantic"] == XhsSEOOptimizedNote
         assert mock_strategy in call_kwargs["context"]
         assert mock_copywriting in call_kwargs["context"]
 
-    @patch("app.crews.xhs_note.tasks.Task")
-    @patch("app.crews.xhs_note.tasks.get_xhs_growth_strategist")
-    def test_task_instances_are_new(self, mock_agent, mock_task_cls):
-        mock_agent.return_value = MagicMock()
-        mock_task_cls.side_effect = [MagicMock(), MagicMock()]
-        from app.crews.xhs_note.tasks import get_task_content_strategy
+    def test_task_instances_are_new(self, task_cls):
+        task_cls.side_effect = [MagicMock(), MagicMock()]
         t1 = get_task_content_strategy()
         t2 = get_task_content_strategy()
         assert t1 is not t2
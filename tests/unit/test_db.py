@@ -1,8 +1,6 @@
 """数据库客户端与模型的单元测试。"""
 
-import tempfile
 from pathlib import Path
-from unittest.mock import patch, MagicMock
 
 import pytest
 
@@ -24,7 +22,7 @@ class TestGenUuid:
     def test_returns_string(self):
         uid = gen_uuid()
         assert isinstance(uid, str)
-        assert len(uid) == 36  # uuid4 format: 8-4-4-4-12
+        assert len(uid) == 32  # uuid4().hex：无连字符的 32 位十六进制
 
     def test_unique(self):
         ids = {gen_uuid() for _ in range(100)}
@@ -53,7 +51,6 @@ class TestOceanbaseClient:
         factory = get_session_factory()
         assert factory is not None
 
-    @pytest.mark.asyncio
     async def test_get_db(self):
         """测试 get_db 生成器能正常 yield session。"""
         from app.db.clients.oceanbase_client import get_db
@@ -67,32 +64,41 @@ class TestOceanbaseClient:
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(scope="module")
+def file_root(tmp_path_factory):
+    """模块级共享的 FILE_ROOT：一次 mkdir + 一次 patch，各测试用不同文件名隔离。
+
+    _safe_path 的 lru_cache 只按相对路径作键、闭包读取 FILE_ROOT，
+    patch 前后都要清缓存，否则条目会把旧根目录带出本模块的生命周期。
+    """
+    from app.db.clients.file_client import _safe_path
+
+    mp = pytest.MonkeyPatch()
+    root = tmp_path_factory.mktemp("files").resolve()
+    mp.setattr("app.db.clients.file_client.FILE_ROOT", root)
+    _safe_path.cache_clear()
+    yield root
+    mp.undo()
+    _safe_path.cache_clear()
+
+
 class TestFileClient:
-    @pytest.mark.asyncio
-    async def test_write_and_read(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("app.db.clients.file_client.FILE_ROOT", Path(tmpdir).resolve()):
-                from app.db.clients.file_client import write_file, read_file
-                await write_file("test.txt", b"hello world")
-                content = await read_file("test.txt")
-                assert content == b"hello world"
-
-    @pytest.mark.asyncio
-    async def test_delete_file(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("app.db.clients.file_client.FILE_ROOT", Path(tmpdir).resolve()):
-                from app.db.clients.file_client import write_file, delete_file
-                await write_file("to_delete.txt", b"data")
-                result = await delete_file("to_delete.txt")
-                assert result is True
-
-    @pytest.mark.asyncio
-    async def test_delete_nonexistent(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("app.db.clients.file_client.FILE_ROOT", Path(tmpdir).resolve()):
-                from app.db.clients.file_client import delete_file
-                result = await delete_file("nonexistent.txt")
-                assert result is False
+    async def test_write_and_read(self, file_root):
+        from app.db.clients.file_client import write_file, read_file
+        await write_file("test.txt", b"hello world")
+        content = await read_file("test.txt")
+        assert content == b"hello world"
+
+    async def test_delete_file(self, file_root):
+        from app.db.clients.file_client import write_file, delete_file
+        await write_file("to_delete.txt", b"data")
+        result = await delete_file("to_delete.txt")
+        assert result is True
+
+    async def test_delete_nonexistent(self, file_root):
+        from app.db.clients.file_client import delete_file
+        result = await delete_file("nonexistent.txt")
+        assert result is False
 
     def test_safe_path_traversal(self):
         from app.db.clients.file_client import _safe_path
@@ -104,10 +110,7 @@ class TestFileClient:
         p = _safe_path("subdir/file.txt")
         assert isinstance(p, Path)
 
-    @pytest.mark.asyncio
-    async def test_write_creates_parent_dirs(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("app.db.clients.file_client.FILE_ROOT", Path(tmpdir).resolve()):
-                from app.db.clients.file_client import write_file
-                await write_file("sub/dir/file.txt", b"data")
-                assert (Path(tmpdir) / "sub" / "dir" / "file.txt").exists()
+    async def test_write_creates_parent_dirs(self, file_root):
+        from app.db.clients.file_client import write_file
+        await write_file("sub/dir/file.txt", b"data")
+        assert (file_root / "sub" / "dir" / "file.txt").exists()
@@ -3,9 +3,7 @@
 from __future__ import annotations
 
 import asyncio
-from unittest.mock import patch, MagicMock, AsyncMock
-
-import pytest
+from unittest.mock import patch, MagicMock
 
 from app.schemas.xhs_note import (
     XhsContentStrategyBrief,
@@ -17,8 +15,16 @@ from app.schemas.xhs_note import (
     XhsSEOOptimizedNote,
     XhsVisualBatchReport,
 )
+from app.crews.xhs_note.flows import (
+    _generate_final_report,
+    _handle_crew_error,
+    _run_content_phase,
+    _run_image_phases_pipelined,
+    _run_single_task_crew,
+    run_xhs_note_flow,
+)
+from app.crews.xhs_note.tasks import build_visual_analysis_task
 from tests.conftest import (
-    MockCrewResult,
     MockTaskOutput,
     make_idea_request,
     make_visual_analysis,
@@ -38,7 +44,6 @@ from tests.conftest import (
 
 class TestGenerateFinalReport:
     def test_basic_report(self):
-        from app.crews.xhs_note.flows import _generate_final_report
         idea = make_idea_request(2)
         edit_batch = make_edit_batch(2)
         seo_note = make_seo_note()
@@ -49,7 +54,6 @@ class TestGenerateFinalReport:
         assert "生成笔记标题" in report
 
     def test_report_contains_edit_plans(self):
-        from app.crews.xhs_note.flows import _generate_final_report
         idea = make_idea_request(1)
         edit_batch = make_edit_batch(1)
         seo_note = make_seo_note()
@@ -64,92 +68,112 @@ class TestGenerateFinalReport:
 
 class TestHandleCrewError:
     def test_logs_error(self):
-        from app.crews.xhs_note.flows import _handle_crew_error
         exc = RuntimeError("test error")
         # Should not raise, just log
         _handle_crew_error(exc, ["test_agent"])
 
 
 # ---------------------------------------------------------------------------
-# _run_visual_analysis_phase (mocked Crew)
+# _run_image_phases_pipelined (mocked Crew)
 # ---------------------------------------------------------------------------
 
 
-class TestRunVisualAnalysisPhase:
-    @pytest.mark.asyncio
+class TestRunImagePhasesPipelined:
     async def test_empty_images(self):
-        from app.crews.xhs_note.flows import _run_visual_analysis_phase
         idea = XhsNoteIdeaRequest(idea_text="test", images=[])
-        visual_by_id, summary = await _run_visual_analysis_phase(idea)
+        visual_by_id, v_sum, edit_by_id, e_sum = await _run_image_phases_pipelined(idea)
         assert visual_by_id == {}
-        assert summary == ""
-
-    @pytest.mark.asyncio
-    @patch("app.crews.xhs_note.flows.Crew")
-    @patch("app.crews.xhs_note.flows.build_visual_analysis_summary_task")
-    @patch("app.crews.xhs_note.flows.build_visual_analysis_task")
-    @patch("app.crews.xhs_note.flows.get_xhs_visual_analyst")
-    async def test_with_images(self, mock_agent, mock_build_task, mock_build_summary, mock_crew_cls):
-        mock_agent.return_value = MagicMock()
-        mock_build_task.return_value = MagicMock()
-        mock_build_summary.return_value = MagicMock()
-
-        visual = make_visual_analysis(0)
-        crew_result = MockCrewResult([
-            MockTaskOutput(pydantic=visual),
-            MockTaskOutput(raw="视觉分析总结"),
+        assert edit_by_id == {}
+        assert v_sum == "" and e_sum == ""
+
+    async def test_pipeline(self, monkeypatch, make_crew_mock):
+        # monkeypatch.setattr 循环替代五层 @patch：直接 setattr + 一条撤销记录，
+        # 不再逐层构造 _patch 对象
+        for name in (
+            "build_visual_analysis_task",
+            "build_image_edit_task",
+            "build_visual_analysis_summary_task",
+            "build_image_edit_plan_summary_task",
+        ):
+            monkeypatch.setattr(
+                f"app.crews.xhs_note.flows.{name}", MagicMock(return_value=MagicMock())
+            )
+
+        # 同一个结果同时携带视觉分析、编辑方案与汇总输出，四次 kickoff 共用
+        mock_crew_instance = make_crew_mock([
+            MockTaskOutput(pydantic=make_visual_analysis(0)),
+            MockTaskOutput(pydantic=make_edit_plan(0)),
+            MockTaskOutput(raw="阶段总结"),
         ])
+        monkeypatch.setattr(
+            "app.crews.xhs_note.flows.Crew", MagicMock(return_value=mock_crew_instance)
+        )
 
-        mock_crew_instance = MagicMock()
-        mock_crew_instance.akickoff = AsyncMock(return_value=crew_result)
-        mock_crew_cls.return_value = mock_crew_instance
-
-        from app.crews.xhs_note.flows import _run_visual_analysis_phase
         idea = make_idea_request(1)
-        visual_by_id, summary = await _run_visual_analysis_phase(idea)
+        visual_by_id, v_sum, edit_by_id, e_sum = await _run_image_phases_pipelined(idea)
         assert "img_0" in visual_by_id
-        assert summary == "视觉分析总结"
+        assert "img_0" in edit_by_id
+        assert v_sum == "阶段总结"
+        assert e_sum == "阶段总结"
+        # 1 张图：视觉分析 + 编辑方案 + 两个汇总 = 4 次 kickoff
+        assert mock_crew_instance.akickoff.await_count == 4
+
+    async def test_no_visual_output_skips_edit(self, monkeypatch, make_crew_mock):
+        """视觉分析未产出结构化结果时，不应为该图启动编辑方案任务。"""
+        for name in ("build_visual_analysis_task", "build_visual_analysis_summary_task"):
+            monkeypatch.setattr(
+                f"app.crews.xhs_note.flows.{name}", MagicMock(return_value=MagicMock())
+            )
+
+        mock_crew_instance = make_crew_mock([MockTaskOutput(raw="无结构化输出")])
+        monkeypatch.setattr(
+            "app.crews.xhs_note.flows.Crew", MagicMock(return_value=mock_crew_instance)
+        )
+
+        idea = make_idea_request(1)
+        visual_by_id, _, edit_by_id, e_sum = await _run_image_phases_pipelined(idea)
+        assert visual_by_id == {}
+        assert edit_by_id == {}
+        assert e_sum == ""
+        # 仅视觉分析 + 视觉汇总两次 kickoff
+        assert mock_crew_instance.akickoff.await_count == 2
 
 
 # ---------------------------------------------------------------------------
-# _run_image_edit_phase (mocked Crew)
+# _run_single_task_crew（并发隔离）
 # ---------------------------------------------------------------------------
 
 
-class TestRunImageEditPhase:
-    @pytest.mark.asyncio
-    async def test_no_visuals(self):
-        from app.crews.xhs_note.flows import _run_image_edit_phase
-        idea = make_idea_request(1)
-        # 没有视觉分析结果，应跳过所有图片
-        edit_by_id, summary = await _run_image_edit_phase(idea, {})
-        assert edit_by_id == {}
+class TestRunSingleTaskCrew:
+    async def test_concurrent_crews_do_not_share_agents(self, monkeypatch, make_crew_mock):
+        """并发的单任务 Crew 必须各自持有独立的 Agent/executor。
 
-    @pytest.mark.asyncio
-    @patch("app.crews.xhs_note.flows.Crew")
-    @patch("app.crews.xhs_note.flows.build_image_edit_plan_summary_task")
-    @patch("app.crews.xhs_note.flows.build_image_edit_task")
-    @patch("app.crews.xhs_note.flows.get_xhs_image_editor")
-    async def test_with_visuals(self, mock_agent, mock_build_task, mock_build_summary, mock_crew_cls):
-        mock_agent.return_value = MagicMock()
-        mock_build_task.return_value = MagicMock()
-        mock_build_summary.return_value = MagicMock()
+        kickoff 会在 Agent 实例上原地绑定 executor 并累积消息历史，
+        任务间共享同一 Agent 会让并发流水线互相串改 prompt。
+        这里走真实的 Task/Agent 构建链路，仅 mock Crew 本身，
+        防止 Agent 工厂再次退回进程内缓存实例。
+        """
+        crew_agents = []
 
-        plan = make_edit_plan(0)
-        crew_result = MockCrewResult([
-            MockTaskOutput(pydantic=plan),
-            MockTaskOutput(raw="编辑方案总结"),
-        ])
+        def _crew_factory(**kwargs):
+            crew_agents.extend(kwargs["agents"])
+            return make_crew_mock([MockTaskOutput(pydantic=make_visual_analysis(0))])
 
-        mock_crew_instance = MagicMock()
-        mock_crew_instance.akickoff = AsyncMock(return_value=crew_result)
-        mock_crew_cls.return_value = mock_crew_instance
+        monkeypatch.setattr("app.crews.xhs_note.flows.Crew", _crew_factory)
 
-        from app.crews.xhs_note.flows import _run_image_edit_phase
-        idea = make_idea_request(1)
-        visual_by_id = {"img_0": make_visual_analysis(0)}
-        edit_by_id, summary = await _run_image_edit_phase(idea, visual_by_id)
-        assert "img_0" in edit_by_id
+        imgs = make_idea_request(2).images
+        tasks = [build_visual_analysis_task(img, "测试意图") for img in imgs]
+        sem = asyncio.Semaphore(2)
+        await asyncio.gather(
+            _run_single_task_crew(tasks[0], sem, ["xhs_visual_analyst"], "", 60),
+            _run_single_task_crew(tasks[1], sem, ["xhs_visual_analyst"], "", 60),
+        )
+
+        assert len(crew_agents) == 2
+        assert crew_agents[0] is not crew_agents[1]
+        # executor 挂在 Agent 上，实例独立即不会共享；若已创建，二者也必须不同
+        e0, e1 = crew_agents[0].agent_executor, crew_agents[1].agent_executor
+        assert e0 is None or e0 is not e1
 
 
 # ---------------------------------------------------------------------------
@@ -158,38 +182,27 @@ class TestRunImageEditPhase:
 
 
 class TestRunContentPhase:
-    @pytest.mark.asyncio
-    @patch("app.crews.xhs_note.flows.Crew")
-    @patch("app.crews.xhs_note.flows.get_task_seo_optimization")
-    @patch("app.crews.xhs_note.flows.get_task_copywriting")
-    @patch("app.crews.xhs_note.flows.get_task_content_strategy")
-    @patch("app.crews.xhs_note.flows.get_xhs_seo_expert")
-    @patch("app.crews.xhs_note.flows.get_xhs_content_writer")
-    @patch("app.crews.xhs_note.flows.get_xhs_growth_strategist")
-    async def test_content_phase(
-        self, mock_strategist, mock_writer, mock_seo,
-        mock_task_strategy, mock_task_copy, mock_task_seo, mock_crew_cls
-    ):
-        for m in [mock_strategist, mock_writer, mock_seo]:
-            m.return_value = MagicMock()
-        for m in [mock_task_strategy, mock_task_copy, mock_task_seo]:
-            m.return_value = MagicMock()
-
-        strategy = make_strategy_brief()
-        copywriting = make_copywriting()
-        seo = make_seo_note()
-
-        crew_result = MockCrewResult([
-            MockTaskOutput(pydantic=strategy),
-            MockTaskOutput(pydantic=copywriting),
-            MockTaskOutput(pydantic=seo),
+    async def test_content_phase(self, monkeypatch, make_crew_mock):
+        for name in (
+            "get_xhs_growth_strategist",
+            "get_xhs_content_writer",
+            "get_xhs_seo_expert",
+            "get_task_content_strategy",
+            "get_task_copywriting",
+            "get_task_seo_optimization",
+        ):
+            monkeypatch.setattr(
+                f"app.crews.xhs_note.flows.{name}", MagicMock(return_value=MagicMock())
+            )
+
+        mock_crew_cls = MagicMock()
+        monkeypatch.setattr("app.crews.xhs_note.flows.Crew", mock_crew_cls)
+        mock_crew_cls.return_value = make_crew_mock([
+            MockTaskOutput(pydantic=make_strategy_brief()),
+            MockTaskOutput(pydantic=make_copywriting()),
+            MockTaskOutput(pydantic=make_seo_note()),
         ])
 
-        mock_crew_instance = MagicMock()
-        mock_crew_instance.akickoff = AsyncMock(return_value=crew_result)
-        mock_crew_cls.return_value = mock_crew_instance
-
-        from app.crews.xhs_note.flows import _run_content_phase
         idea = make_idea_request(1)
         visual_batch = make_visual_batch(1)
         edit_batch = make_edit_batch(1)
@@ -205,38 +218,30 @@ class TestRunContentPhase:
 
 
 class TestRunXhsNoteFlow:
-    @pytest.mark.asyncio
     async def test_no_images(self):
-        from app.crews.xhs_note.flows import run_xhs_note_flow
         idea = XhsNoteIdeaRequest(idea_text="test", images=[])
         report, error = await run_xhs_note_flow(idea)
         assert report is None
         assert "未上传" in error
 
-    @pytest.mark.asyncio
     @patch("app.crews.xhs_note.flows._run_content_phase")
-    @patch("app.crews.xhs_note.flows._run_image_edit_phase")
-    @patch("app.crews.xhs_note.flows._run_visual_analysis_phase")
-    async def test_full_flow(self, mock_visual, mock_edit, mock_content):
+    @patch("app.crews.xhs_note.flows._run_image_phases_pipelined")
+    async def test_full_flow(self, mock_pipeline, mock_content):
         visual = make_visual_analysis(0)
         plan = make_edit_plan(0)
-        mock_visual.return_value = ({"img_0": visual}, "视觉总结")
-        mock_edit.return_value = ({"img_0": plan}, "编辑总结")
+        mock_pipeline.return_value = ({"img_0": visual}, "视觉总结", {"img_0": plan}, "编辑总结")
         mock_content.return_value = (make_strategy_brief(), make_copywriting(), make_seo_note())
 
-        from app.crews.xhs_note.flows import run_xhs_note_flow
         idea = make_idea_request(1)
         report, error = await run_xhs_note_flow(idea)
         assert error == ""
         assert report is not None
         assert "地中海" in report
 
-    @pytest.mark.asyncio
-    @patch("app.crews.xhs_note.flows._run_visual_analysis_phase")
-    async def test_flow_exception(self, mock_visual):
-        mock_visual.side_effect = RuntimeError("LLM 超时")
+    @patch("app.crews.xhs_note.flows._run_image_phases_pipelined")
+    async def test_flow_exception(self, mock_pipeline):
+        mock_pipeline.side_effect = RuntimeError("LLM 超时")
 
-        from app.crews.xhs_note.flows import run_xhs_note_flow
         idea = make_idea_request(1)
         report, error = await run_xhs_note_flow(idea)
         assert report is None
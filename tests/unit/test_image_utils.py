@@ -1,123 +1,91 @@
 """图片压缩工具的单元测试。"""
 
-import tempfile
+import shutil
 from pathlib import Path
 
 import pytest
 
-
-try:
-    from PIL import Image
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
+# Pillow 缺失时整个模块跳过一次，免去每个用例的 skipif 评估
+Image = pytest.importorskip("PIL.Image")
 
 from app.core.image_utils import compress_image_to_standard
 
 
-def _create_test_image(path: Path, size: tuple = (200, 150), mode: str = "RGB", fmt: str = "JPEG"):
-    """创建测试用图片文件。"""
-    if not HAS_PIL:
-        pytest.skip("Pillow not installed")
-    img = Image.new(mode, size, color="red")
-    img.save(str(path), fmt)
-    return path
+@pytest.fixture(scope="module")
+def src_image(tmp_path_factory):
+    """按 (size, mode, fmt) 缓存的标准测试图工厂。
+
+    每种规格只经历一次 PIL 编码与落盘；压缩会原地改写输入文件，
+    测试用例须先把返回的源图复制进自己的 tmp_path 再使用。
+    """
+    base = tmp_path_factory.mktemp("imgs")
+    cache: dict = {}
+
+    def _get(size: tuple = (200, 150), mode: str = "RGB", fmt: str = "JPEG") -> Path:
+        key = (size, mode, fmt)
+        if key not in cache:
+            path = base / f"{mode}_{size[0]}x{size[1]}.{'png' if fmt == 'PNG' else 'jpg'}"
+            img = Image.new(mode, size) if mode == "P" else Image.new(mode, size, color="red")
+            img.save(str(path), fmt)
+            cache[key] = path
+        return cache[key]
+
+    return _get
 
 
-@pytest.mark.skipif(not HAS_PIL, reason="Pillow not installed")
 class TestCompressImageToStandard:
-    def test_no_resize_quality_only(self):
+    def test_no_resize_quality_only(self, src_image, tmp_path):
         """max_size=0 时仅重编码不缩放。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "test.jpg"
-            _create_test_image(src, size=(100, 80))
-
-            result = compress_image_to_standard(src, max_size=0, quality=85)
-            assert result.exists()
-            with Image.open(result) as im:
-                assert im.size == (100, 80)
-
-    def test_resize_large_image(self):
-        """长边超过 max_size 时应等比缩放。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "big.jpg"
-            _create_test_image(src, size=(2000, 1500))
-
-            result = compress_image_to_standard(src, max_size=500, quality=85)
-            assert result.exists()
-            with Image.open(result) as im:
-                w, h = im.size
-                assert max(w, h) <= 500
-
-    def test_resize_tall_image(self):
-        """竖版图片长边也应缩放。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "tall.jpg"
-            _create_test_image(src, size=(800, 1600))
-
-            result = compress_image_to_standard(src, max_size=400, quality=85)
-            with Image.open(result) as im:
-                assert max(im.size) <= 400
-
-    def test_small_image_no_resize(self):
-        """小于 max_size 的图片不缩放。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "small.jpg"
-            _create_test_image(src, size=(50, 50))
-
-            result = compress_image_to_standard(src, max_size=500, quality=85)
-            with Image.open(result) as im:
-                assert im.size == (50, 50)
-
-    def test_output_to_different_path(self):
+        src = Path(shutil.copy(src_image(size=(100, 80)), tmp_path / "test.jpg"))
+
+        result = compress_image_to_standard(src, max_size=0, quality=85)
+        assert result.exists()
+        with Image.open(result) as im:
+            assert im.size == (100, 80)
+
+    # 尺寸/模式/格式矩阵收敛为一张参数表：横版缩放、竖版缩放、小图不缩放、
+    # RGBA 保留 PNG、灰度图、P 模式转换
+    @pytest.mark.parametrize(
+        "size,mode,fmt,max_size,expect_max,expect_suffix",
+        [
+            ((2000, 1500), "RGB", "JPEG", 500, 500, ".jpg"),
+            ((800, 1600), "RGB", "JPEG", 400, 400, ".jpg"),
+            ((50, 50), "RGB", "JPEG", 500, 50, ".jpg"),
+            ((100, 100), "RGBA", "PNG", 0, 100, ".png"),
+            ((50, 50), "L", "JPEG", 0, 50, ".jpg"),
+            ((50, 50), "P", "PNG", 0, 50, None),
+        ],
+    )
+    def test_size_mode_matrix(
+        self, src_image, tmp_path, size, mode, fmt, max_size, expect_max, expect_suffix
+    ):
+        ext = "png" if fmt == "PNG" else "jpg"
+        src = Path(shutil.copy(src_image(size=size, mode=mode, fmt=fmt), tmp_path / f"src.{ext}"))
+
+        result = compress_image_to_standard(src, max_size=max_size, quality=85)
+        assert result.exists()
+        if expect_suffix is not None:
+            assert result.suffix.lower() == expect_suffix
+        with Image.open(result) as im:
+            assert max(im.size) <= expect_max
+
+    def test_output_to_different_path(self, src_image, tmp_path):
         """指定 output_path 时保存到目标路径。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "input.jpg"
-            out = Path(tmpdir) / "output.jpg"
-            _create_test_image(src, size=(100, 100))
-
-            result = compress_image_to_standard(src, max_size=0, quality=50, output_path=out)
-            assert result.exists()
-            assert "output" in str(result)
-
-    def test_rgba_to_png(self):
-        """RGBA 图片应保存为 PNG。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "rgba.png"
-            _create_test_image(src, size=(100, 100), mode="RGBA", fmt="PNG")
+        src = Path(shutil.copy(src_image(size=(100, 100)), tmp_path / "input.jpg"))
+        out = tmp_path / "output.jpg"
 
-            result = compress_image_to_standard(src, max_size=0, quality=85)
-            assert result.suffix.lower() == ".png"
+        result = compress_image_to_standard(src, max_size=0, quality=50, output_path=out)
+        assert result.exists()
+        assert "output" in str(result)
 
     def test_file_not_found(self):
         """不存在的文件应抛出 FileNotFoundError。"""
         with pytest.raises(FileNotFoundError):
             compress_image_to_standard(Path("/nonexistent/image.jpg"), max_size=0, quality=85)
 
-    def test_quality_clamping(self):
+    def test_quality_clamping(self, src_image, tmp_path):
         """质量参数应被正确限制。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "test.jpg"
-            _create_test_image(src, size=(50, 50))
-            # quality=200 should be clamped to 100
-            result = compress_image_to_standard(src, max_size=0, quality=200)
-            assert result.exists()
-
-    def test_palette_mode_conversion(self):
-        """P 模式图片应正确转换。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "palette.png"
-            img = Image.new("P", (50, 50))
-            img.save(str(src), "PNG")
-
-            result = compress_image_to_standard(src, max_size=0, quality=85)
-            assert result.exists()
-
-    def test_l_mode(self):
-        """灰度图应正确处理。"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = Path(tmpdir) / "gray.jpg"
-            _create_test_image(src, size=(50, 50), mode="L")
-
-            result = compress_image_to_standard(src, max_size=0, quality=85)
-            assert result.exists()
+        src = Path(shutil.copy(src_image(size=(50, 50)), tmp_path / "test.jpg"))
+        # quality=200 should be clamped to 100
+        result = compress_image_to_standard(src, max_size=0, quality=200)
+        assert result.exists()
@@ -3,15 +3,104 @@
 from __future__ import annotations
 
 import json
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+
+import httpx
+import requests
+from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
 
+# 模块对象只解析一次，patch 不再逐次解析点分路径字符串
+from app.crews.llm import aliyun_llm as _llm_mod
 from app.crews.llm.aliyun_llm import AliyunLLM
 
 
+# 响应骨架中不随用例变化的部分只建一次（只读约定，勿原地修改）
+_USAGE = {"total_tokens": 100}
+
+# 预构建的典型 HTTP 错误（requests.HTTPError 与客户端的重试分类器对齐）
+_HTTP_500 = requests.HTTPError("500 Internal Server Error")
+_HTTP_429 = requests.HTTPError("429 Too Many Requests")
+_HTTP_400 = requests.HTTPError("400 Bad Request")
+
+
+def _resp(
+    content: str = "回答内容",
+    status: int = 200,
+    *,
+    tool_calls=None,
+    body: dict | None = None,
+    raises: Exception | None = None,
+) -> SimpleNamespace:
+    """构造轻量响应桩：具体属性 + 真实 json 字节，不走 MagicMock 的子 mock 机制。"""
+    if body is None:
+        msg = {"content": content}
+        if tool_calls is not None:
+            msg["tool_calls"] = tool_calls
+        body = {"choices": [{"message": msg}], "usage": _USAGE}
+
+    def raise_for_status():
+        if raises is not None:
+            raise raises
+
+    return SimpleNamespace(
+        status_code=status,
+        content=json.dumps(body).encode("utf-8"),
+        text="OK" if status == 200 else f"HTTP {status}",
+        headers={},
+        raise_for_status=raise_for_status,
+    )
+
+
+# 同步回退路径的 Session（call() 走该路径）整个模块只 patch 一次，
+# 函数级 fixture 在用例间重置共享的 post mock
+@pytest.fixture(scope="module")
+def _session_patched():
+    mp = pytest.MonkeyPatch()
+    session = MagicMock()
+    session.post = MagicMock()
+    mp.setattr(_llm_mod, "_SESSION", session)
+    yield session.post
+    mp.undo()
+
+
+@pytest.fixture
+def mock_post(_session_patched):
+    _session_patched.reset_mock(return_value=True, side_effect=True)
+    return _session_patched
+
+
+def _mock_apost(mock_get_client) -> AsyncMock:
+    """将共享异步客户端 mock 掉，返回其 post（AsyncMock）供测试设置返回值。"""
+    client = MagicMock()
+    client.post = AsyncMock()
+    mock_get_client.return_value = client
+    return client.post
+
+
+# 共享的配置桩：SimpleNamespace 的属性读取是普通 __dict__ 查找，
+# 没有 MagicMock 的子 mock 机制；autouse 模块级 fixture 只 patch 一次
+_SETTINGS_STUB = SimpleNamespace(
+    llm_api_key="test-key",
+    llm_model="qwen-plus",
+    llm_region="cn",
+    llm_timeout=600,
+    llm_retry_count=3,
+    llm_image_model="qwen3-vl-plus",
+)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _patched_settings():
+    mp = pytest.MonkeyPatch()
+    mp.setattr(_llm_mod, "get_settings", lambda: _SETTINGS_STUB)
+    yield _SETTINGS_STUB
+    mp.undo()
+
+
 def _make_llm(**kwargs) -> AliyunLLM:
-    """创建一个测试用 AliyunLLM 实例。"""
+    """创建一个测试用 AliyunLLM 实例（配置经 _patched_settings 统一打桩）。"""
     defaults = dict(
         model="qwen-test",
         api_key="test-key-123",
@@ -20,53 +109,37 @@ def _make_llm(**kwargs) -> AliyunLLM:
         retry_count=1,
     )
     defaults.update(kwargs)
-    with patch("app.crews.llm.aliyun_llm.get_settings") as mock_settings:
-        s = MagicMock()
-        s.llm_api_key = defaults.get("api_key", "test-key")
-        s.llm_model = "qwen-plus"
-        s.llm_region = "cn"
-        s.llm_timeout = 600
-        s.llm_retry_count = 3
-        s.llm_image_model = "qwen3-vl-plus"
-        mock_settings.return_value = s
-        return AliyunLLM(**defaults)
+    return AliyunLLM(**defaults)
+
+
+@pytest.fixture(scope="class")
+def llm(_patched_settings):
+    """类级共享的 AliyunLLM 实例：构造参数不变的用例无需各自重建。"""
+    return _make_llm()
 
 
 class TestAliyunLLMInit:
-    def test_basic_init(self):
-        llm = _make_llm()
+    def test_basic_init(self, llm):
         assert llm.model == "qwen-test"
         assert llm.api_key == "test-key-123"
         assert llm.region == "cn"
 
-    def test_endpoint_cn(self):
-        llm = _make_llm(region="cn")
-        assert "dashscope.aliyuncs.com" in llm.endpoint
-
-    def test_endpoint_intl(self):
-        llm = _make_llm(region="intl")
-        assert "intl" in llm.endpoint
-
-    def test_endpoint_finance(self):
-        llm = _make_llm(region="finance")
-        assert "finance" in llm.endpoint
+    @pytest.mark.parametrize(
+        "region,frag",
+        [("cn", "dashscope.aliyuncs.com"), ("intl", "intl"), ("finance", "finance")],
+    )
+    def test_endpoint_by_region(self, region, frag):
+        assert frag in _make_llm(region=region).endpoint
 
     def test_invalid_region(self):
         with pytest.raises(ValueError, match="不支持的地域"):
             _make_llm(region="invalid")
 
-    def test_no_api_key(self):
-        with patch("app.crews.llm.aliyun_llm.get_settings") as mock_settings:
-            s = MagicMock()
-            s.llm_api_key = ""
-            s.llm_model = "qwen-plus"
-            s.llm_region = "cn"
-            s.llm_timeout = 600
-            s.llm_retry_count = 3
-            s.llm_image_model = "qwen3-vl-plus"
-            mock_settings.return_value = s
-            with pytest.raises(ValueError, match="API Key"):
-                AliyunLLM(api_key="")
+    def test_no_api_key(self, monkeypatch):
+        empty = SimpleNamespace(**{**vars(_SETTINGS_STUB), "llm_api_key": ""})
+        monkeypatch.setattr(_llm_mod, "get_settings", lambda: empty)
+        with pytest.raises(ValueError, match="API Key"):
+            AliyunLLM(api_key="")
 
     def test_image_model(self):
         llm = _make_llm(image_model="my-vl-model")
@@ -74,129 +147,79 @@ class TestAliyunLLMInit:
 
 
 class TestAliyunLLMCall:
-    def _mock_response(self, content: str = "回答内容", status_code: int = 200, tool_calls=None):
-        resp = MagicMock()
-        resp.status_code = status_code
-        msg = {"content": content}
-        if tool_calls is not None:
-            msg["tool_calls"] = tool_calls
-        resp.json.return_value = {
-            "choices": [{"message": msg}],
-            "usage": {"total_tokens": 100},
-        }
-        resp.raise_for_status = MagicMock()
-        resp.text = "OK"
-        return resp
-
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_string(self, mock_post):
-        mock_post.return_value = self._mock_response("你好")
-        llm = _make_llm()
+    def test_call_string(self, mock_post, llm):
+        mock_post.return_value = _resp("你好")
         result = llm.call("测试消息")
         assert result == "你好"
         mock_post.assert_called_once()
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_messages_list(self, mock_post):
-        mock_post.return_value = self._mock_response("回答")
-        llm = _make_llm()
+    def test_call_messages_list(self, mock_post, llm):
+        mock_post.return_value = _resp("回答")
         result = llm.call([{"role": "user", "content": "你好"}])
         assert result == "回答"
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
     def test_call_with_temperature(self, mock_post):
-        mock_post.return_value = self._mock_response("回答")
+        mock_post.return_value = _resp("回答")
         llm = _make_llm(temperature=0.7)
         llm.call("test")
-        payload = mock_post.call_args.kwargs.get("json") or mock_post.call_args[1].get("json")
+        payload = json.loads(mock_post.call_args.kwargs["data"])
         assert payload["temperature"] == 0.7
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_empty_content_retry(self, mock_post):
-        empty_resp = self._mock_response("")
-        ok_resp = self._mock_response("成功回答")
+    def test_call_empty_content_retry(self, mock_post, llm):
+        empty_resp = _resp("")
+        ok_resp = _resp("成功回答")
         mock_post.side_effect = [empty_resp, ok_resp]
-        llm = _make_llm()
         result = llm.call("test")
         assert result == "成功回答"
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_no_choices(self, mock_post):
-        resp = MagicMock()
-        resp.status_code = 200
-        resp.json.return_value = {"choices": []}
-        resp.raise_for_status = MagicMock()
-        resp.text = "OK"
-        mock_post.return_value = resp
-        llm = _make_llm()
+    def test_call_no_choices(self, mock_post, llm):
+        mock_post.return_value = _resp(body={"choices": []})
         with pytest.raises(ValueError, match="choices"):
             llm.call("test")
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
     def test_call_server_error_retry(self, mock_post):
-        error_resp = MagicMock()
-        error_resp.status_code = 500
-        error_resp.text = "Internal Server Error"
-        error_resp.raise_for_status = MagicMock(side_effect=Exception("500"))
-
-        ok_resp = self._mock_response("成功")
+        error_resp = _resp(status=500, raises=_HTTP_500)
+        ok_resp = _resp("成功")
         mock_post.side_effect = [error_resp, ok_resp]
         llm = _make_llm(retry_count=1)
         result = llm.call("test")
         assert result == "成功"
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
     def test_call_rate_limit_retry(self, mock_post):
-        limit_resp = MagicMock()
-        limit_resp.status_code = 429
-        limit_resp.text = "Too Many Requests"
-        limit_resp.raise_for_status = MagicMock(side_effect=Exception("429"))
-
-        ok_resp = self._mock_response("ok")
+        limit_resp = _resp(status=429, raises=_HTTP_429)
+        ok_resp = _resp("ok")
         mock_post.side_effect = [limit_resp, ok_resp]
         llm = _make_llm(retry_count=1)
         result = llm.call("test")
         assert result == "ok"
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_client_error_no_retry(self, mock_post):
-        bad_resp = MagicMock()
-        bad_resp.status_code = 400
-        bad_resp.text = "Bad Request"
-        bad_resp.raise_for_status.side_effect = Exception("400 Bad Request")
-        mock_post.return_value = bad_resp
-        llm = _make_llm()
-        with pytest.raises(Exception):
+    def test_call_client_error_no_retry(self, mock_post, llm):
+        mock_post.return_value = _resp(status=400, raises=_HTTP_400)
+        with pytest.raises(requests.HTTPError):
             llm.call("test")
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
     def test_call_timeout(self, mock_post):
-        import requests
-        mock_post.side_effect = requests.Timeout()
+        mock_post.side_effect = httpx.TimeoutException("timeout")
         llm = _make_llm(retry_count=0)
         with pytest.raises(TimeoutError):
             llm.call("test")
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    def test_call_with_callbacks(self, mock_post):
-        mock_post.return_value = self._mock_response("ok")
+    def test_call_with_callbacks(self, mock_post, llm):
+        mock_post.return_value = _resp("ok")
         cb = MagicMock()
         cb.on_llm_start = MagicMock()
         cb.on_llm_end = MagicMock()
-        llm = _make_llm()
         llm.call("test", callbacks=[cb])
         cb.on_llm_start.assert_called_once()
         cb.on_llm_end.assert_called_once()
 
-    def test_max_iterations_zero(self):
-        llm = _make_llm()
+    def test_max_iterations_zero(self, llm):
         with pytest.raises(RuntimeError, match="最大迭代"):
             llm.call("test", max_iterations=0)
 
 
 class TestAliyunLLMMultimodal:
-    def test_normalize_base64(self):
-        llm = _make_llm()
+    def test_normalize_base64(self, llm):
         messages = [
             {"role": "user", "content": "请分析图片"},
             {"role": "assistant", "content": "add_image_to_content_local data:image/jpeg;base64,/9j/abc123"},
@@ -206,8 +229,7 @@ class TestAliyunLLMMultimodal:
         assert result[1]["role"] == "user"
         assert isinstance(result[1]["content"], list)
 
-    def test_normalize_no_multimodal(self):
-        llm = _make_llm()
+    def test_normalize_no_multimodal(self, llm):
         messages = [
             {"role": "user", "content": "普通消息"},
             {"role": "assistant", "content": "普通回复"},
@@ -216,74 +238,56 @@ class TestAliyunLLMMultimodal:
         assert flag is False
         assert len(result) == 2
 
-    def test_normalize_http_image(self):
-        llm = _make_llm()
+    def test_normalize_http_image(self, llm):
         messages = [
             {"role": "assistant", "content": "add_image_to_content_local Observation: http://example.com/img.jpg"},
         ]
         result, flag = llm._normalize_multimodal_tool_result(messages)
         assert flag is True
 
-    @patch("app.crews.llm.aliyun_llm.requests.post")
     def test_multimodal_model_switch(self, mock_post):
         """包含多模态消息时应切换到 image_model。"""
-        resp = MagicMock()
-        resp.status_code = 200
-        resp.json.return_value = {"choices": [{"message": {"content": "分析结果"}}]}
-        resp.raise_for_status = MagicMock()
-        resp.text = "OK"
-        mock_post.return_value = resp
+        mock_post.return_value = _resp("分析结果")
 
         llm = _make_llm(image_model="my-vl-model")
         llm.call([
             {"role": "user", "content": "请分析"},
             {"role": "assistant", "content": "add_image_to_content_local data:image/jpeg;base64,/9j/test"},
         ])
-        payload = mock_post.call_args.kwargs.get("json") or mock_post.call_args[1].get("json")
+        payload = json.loads(mock_post.call_args.kwargs["data"])
         assert payload["model"] == "my-vl-model"
 
 
 class TestAliyunLLMHelpers:
-    def test_supports_function_calling(self):
-        llm = _make_llm()
+    def test_supports_function_calling(self, llm):
         assert llm.supports_function_calling() is False
 
-    def test_supports_stop_words(self):
-        llm = _make_llm()
+    def test_supports_stop_words(self, llm):
         assert llm.supports_stop_words() is True
 
-    def test_get_context_window_size_default(self):
-        llm = _make_llm(model="qwen-test")
-        assert llm.get_context_window_size() == 8192
-
-    def test_get_context_window_size_long(self):
-        llm = _make_llm(model="qwen-long-test")
-        assert llm.get_context_window_size() == 200_000
-
-    def test_get_context_window_size_max(self):
-        llm = _make_llm(model="qwen-max")
-        assert llm.get_context_window_size() == 8192
+    @pytest.mark.parametrize(
+        "model,expected",
+        [("qwen-test", 8192), ("qwen-long-test", 200_000), ("qwen-max", 8192)],
+    )
+    def test_get_context_window_size(self, model, expected):
+        assert _make_llm(model=model).get_context_window_size() == expected
 
-    def test_validate_messages_valid(self):
-        llm = _make_llm()
+    def test_validate_messages_valid(self, llm):
         llm._validate_messages([
             {"role": "system", "content": "系统提示"},
             {"role": "user", "content": "用户输入"},
             {"role": "assistant", "content": "助手回复"},
         ])
 
-    def test_validate_messages_invalid_role(self):
-        llm = _make_llm()
+    def test_validate_messages_invalid_role(self, llm):
         with pytest.raises(ValueError, match="role"):
             llm._validate_messages([{"role": "invalid", "content": "test"}])
 
-    def test_validate_messages_missing_content(self):
-        llm = _make_llm()
+    def test_validate_messages_missing_content(self, llm):
         with pytest.raises(ValueError, match="content"):
             llm._validate_messages([{"role": "user"}])
 
-    def test_validate_messages_multimodal_content(self):
-        llm = _make_llm()
+    def test_validate_messages_multimodal_content(self, llm):
         llm._validate_messages([{
             "role": "user",
             "content": [
@@ -292,59 +296,39 @@ class TestAliyunLLMHelpers:
             ],
         }])
 
-    def test_prepare_stop_words_string(self):
-        llm = _make_llm()
-        assert llm._prepare_stop_words("stop") == "stop"
-
-    def test_prepare_stop_words_list(self):
-        llm = _make_llm()
-        assert llm._prepare_stop_words(["stop1", "stop2"]) == ["stop1", "stop2"]
-
-    def test_prepare_stop_words_none(self):
-        llm = _make_llm()
-        assert llm._prepare_stop_words("") is None
-        assert llm._prepare_stop_words(None) is None
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("stop", "stop"),
+            (["stop1", "stop2"], ["stop1", "stop2"]),
+            ("", None),
+            (None, None),
+        ],
+    )
+    def test_prepare_stop_words(self, llm, value, expected):
+        assert llm._prepare_stop_words(value) == expected
 
 
 class TestAliyunLLMAcall:
-    @pytest.mark.asyncio
-    @patch("app.crews.llm.aliyun_llm.requests.post")
-    async def test_acall(self, mock_post):
-        resp = MagicMock()
-        resp.status_code = 200
-        resp.json.return_value = {"choices": [{"message": {"content": "异步回答"}}]}
-        resp.raise_for_status = MagicMock()
-        resp.text = "OK"
-        mock_post.return_value = resp
-
-        llm = _make_llm()
+    @patch.object(_llm_mod, "get_http_client")
+    async def test_acall(self, mock_get_client, llm):
+        mock_post = _mock_apost(mock_get_client)
+        mock_post.return_value = _resp("异步回答")
+
         result = await llm.acall("测试")
         assert result == "异步回答"
 
 
 class TestGetLlm:
-    @patch("app.crews.llm.get_settings")
-    def test_get_llm_aliyun(self, mock_settings):
-        s = MagicMock()
-        s.llm_provider = "aliyun"
-        s.llm_model = "qwen-plus"
-        s.llm_api_key = "test-key"
-        s.llm_region = "cn"
-        s.llm_timeout = 600
-        s.llm_retry_count = 3
-        s.llm_image_model = "qwen3-vl-plus"
-        mock_settings.return_value = s
-
+    @pytest.mark.parametrize("provider,exc", [("aliyun", None), ("openai", ValueError)])
+    def test_get_llm(self, monkeypatch, provider, exc):
         from app.crews.llm import get_llm
-        llm = get_llm()
-        assert isinstance(llm, AliyunLLM)
 
-    @patch("app.crews.llm.get_settings")
-    def test_get_llm_invalid_provider(self, mock_settings):
-        s = MagicMock()
-        s.llm_provider = "openai"
-        mock_settings.return_value = s
-
-        from app.crews.llm import get_llm
-        with pytest.raises(ValueError, match="不支持"):
-            get_llm(provider="openai")
+        stub = SimpleNamespace(**{**vars(_SETTINGS_STUB), "llm_provider": provider})
+        monkeypatch.setattr("app.crews.llm.get_settings", lambda: stub)
+        if exc is None:
+            get_llm.cache_clear()  # get_llm 按入参缓存，清掉避免拿到其他用例的实例
+            assert isinstance(get_llm(), AliyunLLM)
+        else:
+            with pytest.raises(exc, match="不支持"):
+                get_llm(provider=provider)
@@ -2,7 +2,6 @@
 
 import logging
 import os
-import tempfile
 from unittest.mock import MagicMock, patch, AsyncMock
 
 import pytest
@@ -29,6 +28,16 @@ from app.observability.metrics import (
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture
+def clean_request_id():
+    """把 request_id 置空并在用例结束后复原（断言失败也不泄漏 token）。"""
+    from app.observability.logging import request_id_ctx
+
+    token = request_id_ctx.set("")
+    yield
+    request_id_ctx.reset(token)
+
+
 class TestRequestId:
     def test_set_and_get(self):
         rid = set_request_id("test-rid-123")
@@ -40,12 +49,8 @@ class TestRequestId:
         assert len(rid) > 0
         assert get_request_id() == rid
 
-    def test_default_empty(self):
-        # Reset context
-        from app.observability.logging import request_id_ctx
-        token = request_id_ctx.set("")
+    def test_default_empty(self, clean_request_id):
         assert get_request_id() == ""
-        request_id_ctx.reset(token)
 
 
 class TestAddRequestId:
@@ -55,13 +60,10 @@ class TestAddRequestId:
         result = add_request_id(None, None, event_dict)
         assert result["request_id"] == "test-abc"
 
-    def test_no_request_id(self):
-        from app.observability.logging import request_id_ctx
-        token = request_id_ctx.set("")
+    def test_no_request_id(self, clean_request_id):
         event_dict = {"event": "test"}
         result = add_request_id(None, None, event_dict)
         assert "request_id" not in result
-        request_id_ctx.reset(token)
 
 
 class TestAddTraceContext:
@@ -74,37 +76,41 @@ class TestAddTraceContext:
         assert result["span_id"] == "s" * 16
 
 
+@pytest.fixture(scope="module")
+def _logging_inited(tmp_path_factory):
+    """整个模块只配置一次日志（configure_logging 每次都会重建监听线程）。"""
+    configure_logging("DEBUG", str(tmp_path_factory.mktemp("logs")))
+
+
 class TestConfigureLogging:
-    def test_creates_log_dir(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            log_dir = os.path.join(tmpdir, "test_logs")
-            configure_logging("INFO", log_dir)
-            assert os.path.isdir(log_dir)
+    def test_creates_log_dir(self, tmp_path):
+        # 目录创建本身是被测行为，这里需要真实调用一次
+        log_dir = str(tmp_path / "test_logs")
+        configure_logging("INFO", log_dir)
+        assert os.path.isdir(log_dir)
 
-    def test_creates_logger(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            configure_logging("DEBUG", tmpdir)
-            logger = get_logger("test_module")
-            assert logger is not None
+    def test_creates_logger(self, _logging_inited):
+        logger = get_logger("test_module")
+        assert logger is not None
 
 
 class TestGetCrewLogFilePath:
-    def test_returns_valid_path(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = get_crew_log_file_path(tmpdir)
-            assert path.startswith(tmpdir)
-            assert path.endswith(".txt")
-            assert "crewai_" in path
-
-    def test_default_dir(self):
+    def test_returns_valid_path(self, tmp_path):
+        path = get_crew_log_file_path(str(tmp_path))
+        assert path.startswith(str(tmp_path))
+        assert path.endswith(".txt")
+        assert "crewai_" in path
+
+    def test_default_dir(self, tmp_path, monkeypatch):
+        # 切进 tmp_path，默认的 ./logs 不会污染仓库工作目录
+        monkeypatch.chdir(tmp_path)
         path = get_crew_log_file_path()
         assert "logs" in path
 
-    def test_creates_dir(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            sub = os.path.join(tmpdir, "sub", "logs")
-            path = get_crew_log_file_path(sub)
-            assert os.path.isdir(sub)
+    def test_creates_dir(self, tmp_path):
+        sub = str(tmp_path / "sub" / "logs")
+        path = get_crew_log_file_path(sub)
+        assert os.path.isdir(sub)
 
 
 # ---------------------------------------------------------------------------
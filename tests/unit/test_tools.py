@@ -1,12 +1,13 @@
 """CrewAI 工具的单元测试：IntermediateTool、AddImageToolLocal。"""
 
 import base64
-import tempfile
-from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
+# xdist 并行（--dist=loadgroup）时本模块固定在同一 worker：
+# crewai 的模块级导入成本只在一个子进程里付一次
+pytestmark = pytest.mark.xdist_group("crewai_heavy")
+
 from app.crews.tools.intermediate_tool import IntermediateTool, IntermediateToolSchema
 from app.crews.tools.add_image_tool_local import (
     AddImageToolLocal,
@@ -14,6 +15,48 @@ from app.crews.tools.add_image_tool_local import (
     _local_path_to_base64_data_url,
 )
 
+# 工具只读取原始字节并按扩展名推断 MIME，测试无需真正的图像解码：
+# 直接内置最小的 1x1 JPEG/PNG 字节串，彻底绕开 PIL 导入与编码器
+_MIN_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb0043000806060706050807070709"
+    "09080a0c140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c20242e2720222c231c1c283729"
+    "2c30313434341f27393d38323c2e333432ffdb0043010909090c0b0c180d0d1832211c21"
+    "323232323232323232323232323232323232323232323232323232323232323232323232"
+    "3232323232323232323232323232ffc00011080001000103012200021101031101ffc400"
+    "1f0000010501010101010100000000000000000102030405060708090a0bffc400b51000"
+    "02010303020403050504040000017d010203000411051221314106135161072271143281"
+    "91a1082342b1c11552d1f02433627282090a161718191a25262728292a3435363738393a"
+    "434445464748494a535455565758595a636465666768696a737475767778797a83848586"
+    "8788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6"
+    "c7c8c9cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffc400"
+    "1f0100030101010101010101010000000000000102030405060708090a0bffc400b51100"
+    "020102040403040705040400010277000102031104052131061241510761711322328108"
+    "144291a1b1c109233352f0156272d10a162434e125f11718191a262728292a3536373839"
+    "3a434445464748494a535455565758595a636465666768696a737475767778797a828384"
+    "85868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4"
+    "c5c6c7c8c9cad2d3d4d5d6d7d8d9dae2e3e4e5e6e7e8e9eaf2f3f4f5f6f7f8f9faffda00"
+    "0c03010002110311003f00f9fe8a28a00fffd9"
+)
+
+_MIN_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489000000"
+    "0d49444154789c6360606060000000050001a5f645400000000049454e44ae426082"
+)
+
+
+@pytest.fixture(scope="module")
+def jpeg_file(tmp_path_factory):
+    p = tmp_path_factory.mktemp("tool_imgs") / "img.jpg"
+    p.write_bytes(_MIN_JPEG)
+    return p
+
+
+@pytest.fixture(scope="module")
+def png_file(tmp_path_factory):
+    p = tmp_path_factory.mktemp("tool_imgs") / "img.png"
+    p.write_bytes(_MIN_PNG)
+    return p
+
 
 # ---------------------------------------------------------------------------
 # IntermediateTool
@@ -81,48 +124,21 @@ class TestAddImageToolLocal:
         result = tool._run(image_url="  http://example.com/img.png  ")
         assert result == "http://example.com/img.png"
 
-    def test_run_local_file(self):
+    def test_run_local_file(self, jpeg_file):
         """使用真实临时文件测试本地图片加载。"""
-        # 创建一个最简 JPEG：1x1 像素
-        try:
-            from PIL import Image
-        except ImportError:
-            pytest.skip("Pillow not installed")
-
-        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
-            img = Image.new("RGB", (10, 10), color="red")
-            img.save(f.name, "JPEG")
-            tmp_path = f.name
-
-        try:
-            tool = AddImageToolLocal()
-            result = tool._run(image_url=tmp_path)
-            assert result.startswith("data:image/jpeg;base64,")
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+        tool = AddImageToolLocal()
+        result = tool._run(image_url=str(jpeg_file))
+        assert result.startswith("data:image/jpeg;base64,")
 
     def test_run_nonexistent_file(self):
         tool = AddImageToolLocal()
         result = tool._run(image_url="/nonexistent/path/image.jpg")
         assert "不存在" in result or "image_url" in result.lower() or isinstance(result, str)
 
-    def test_run_png_file(self):
-        try:
-            from PIL import Image
-        except ImportError:
-            pytest.skip("Pillow not installed")
-
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            img = Image.new("RGBA", (10, 10), color=(0, 0, 255, 128))
-            img.save(f.name, "PNG")
-            tmp_path = f.name
-
-        try:
-            tool = AddImageToolLocal()
-            result = tool._run(image_url=tmp_path)
-            assert result.startswith("data:image/png;base64,")
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+    def test_run_png_file(self, png_file):
+        tool = AddImageToolLocal()
+        result = tool._run(image_url=str(png_file))
+        assert result.startswith("data:image/png;base64,")
 
 
 class TestLocalPathToBase64:
@@ -130,23 +146,10 @@ class TestLocalPathToBase64:
         result = _local_path_to_base64_data_url("/nonexistent/file.jpg")
         assert "不存在" in result
 
-    def test_valid_file(self):
-        try:
-            from PIL import Image
-        except ImportError:
-            pytest.skip("Pillow not installed")
-
-        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
-            img = Image.new("RGB", (5, 5), color="green")
-            img.save(f.name, "JPEG")
-            tmp_path = f.name
-
-        try:
-            result = _local_path_to_base64_data_url(tmp_path)
-            assert result.startswith("data:image/jpeg;base64,")
-            # Verify base64 is decodable
-            b64_data = result.split(",", 1)[1]
-            decoded = base64.b64decode(b64_data)
-            assert len(decoded) > 0
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+    def test_valid_file(self, jpeg_file):
+        result = _local_path_to_base64_data_url(str(jpeg_file))
+        assert result.startswith("data:image/jpeg;base64,")
+        # Verify base64 is decodable
+        b64_data = result.split(",", 1)[1]
+        decoded = base64.b64decode(b64_data)
+        assert len(decoded) > 0